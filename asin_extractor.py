@@ -0,0 +1,57 @@
+"""
+asin_extractor.py - ASIN extraction from Amazon listing / deals HTML
+Features:
+ - Anchor scanner: each pattern starts with a literal anchor (/dp/, /gp/product/, asin)
+   so the regex engine jumps between anchors instead of trying every offset
+ - Patterns compiled once, two passes per page instead of six
+ - Strict validation: B0 + 8 alphanumerics, or an ISBN-10 with a valid check digit
+"""
+
+import re
+from typing import Iterable, Set
+
+# Each pattern begins with a literal, which lets sre use its fast prefix search.
+# `asin...` covers data-asin=, data-csa-c-asin= and "asin": "..." in embedded JSON.
+# The old catch-all `data-testid=".*?([A-Z0-9]{10})"` pattern is dropped: it
+# backtracks across whole attributes and mostly matched ids that were not ASINs.
+# The trailing lookahead rejects longer tokens that merely start with 10 valid chars.
+ASIN_ANCHOR_PATTERNS = [
+    r'/(?:dp|gp/product)/([A-Z0-9]{10})(?![A-Za-z0-9])',
+    r'asin["\']?\s*[:=]\s*["\']?([A-Z0-9]{10})(?![A-Za-z0-9])',
+]
+
+_ASIN_RE = re.compile(r'^(?:B0[0-9A-Z]{8}|[0-9]{9}[0-9X])$')
+
+
+def is_valid_asin(candidate: str) -> bool:
+    if not _ASIN_RE.match(candidate):
+        return False
+    if candidate[0] == "B":
+        return True
+    # ISBN-10 (book ASINs): weighted sum must be divisible by 11
+    total = sum((10 - i) * (10 if c == "X" else int(c)) for i, c in enumerate(candidate))
+    return total % 11 == 0
+
+
+class AsinExtractor:
+    def __init__(self, patterns: Iterable[str] = ASIN_ANCHOR_PATTERNS):
+        self.patterns = [re.compile(p) for p in patterns]
+
+    def extract(self, html: str) -> Set[str]:
+        if not html:
+            return set()
+        candidates = set()
+        for pattern in self.patterns:
+            candidates.update(pattern.findall(html))
+        return {m for m in candidates if is_valid_asin(m)}
+
+
+_extractor = None
+
+
+def extract_asins(html: str) -> Set[str]:
+    """Module-level entry point so ProcessPoolExecutor workers can call it."""
+    global _extractor
+    if _extractor is None:
+        _extractor = AsinExtractor()
+    return _extractor.extract(html)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+bench_asin_extractor.py - throughput benchmark for ASIN extraction
+Reports MB/s and ASINs found per page for the compiled anchor-scanning extractor
+and, for comparison, the previous six-pattern re.findall loop.
+
+Fixtures: saved deals/search pages as *.html or *.html.gz in benchmarks/fixtures
+(or --fixtures DIR), each optionally with a <name>.asins file listing the ASINs the
+page really lists (one per line) so misses and false positives are reported.
+Without fixtures, deterministic synthetic pages are used.
+
+Usage: python benchmarks/bench_asin_extractor.py [--repeat 5] [--min-mbps 50]
+"""
+
+import os
+import re
+import sys
+import gzip
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from asin_extractor import AsinExtractor  # noqa: E402
+from synthetic import make_pages  # noqa: E402
+
+LEGACY_PATTERNS = [
+    r'/dp/([A-Z0-9]{10})',
+    r'/gp/product/([A-Z0-9]{10})',
+    r'data-asin=["\']?([A-Z0-9]{10})["\']?',
+    r'asin["\']?\s*[:=]\s*["\']([A-Z0-9]{10})["\']',
+    r'data-csa-c-asin=["\']([A-Z0-9]{10})["\']',
+    r'data-testid=".*?([A-Z0-9]{10})"'
+]
+
+
+def legacy_extract(html: str) -> set:
+    asins = set()
+    for pattern in LEGACY_PATTERNS:
+        for m in re.findall(pattern, html):
+            if len(m) == 10 and m.isalnum():
+                asins.add(m)
+    return asins
+
+
+def load_fixtures(directory: str):
+    pages = []
+    for path in sorted(Path(directory).glob("*.html*")):
+        if path.suffix == ".gz":
+            with gzip.open(path, "rt", encoding="utf-8", errors="replace") as f:
+                html = f.read()
+        else:
+            html = path.read_text(encoding="utf-8", errors="replace")
+        listing = path.parent / (path.name.split(".html")[0] + ".asins")
+        expected = set(listing.read_text(encoding="utf-8").split()) if listing.exists() else None
+        pages.append((path.name, html, expected))
+    return pages
+
+
+def bench(name, fn, pages, repeat):
+    total_bytes = sum(len(html.encode("utf-8")) for _, html, _ in pages)
+    best = float("inf")
+    results = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(html) for _, html, _ in pages]
+        best = min(best, time.perf_counter() - start)
+    mbps = total_bytes / best / 1e6 if best > 0 else float("inf")
+    print(f"\n{name}: {total_bytes / 1e6:.2f} MB in {best * 1000:.1f} ms -> {mbps:.1f} MB/s")
+    for (label, _, expected), found in zip(pages, results):
+        line = f"  {label:<40} {len(found):>5} ASINs"
+        if expected is not None:
+            line += f"  (expected {len(expected)}, false positives {len(found - expected)}, missed {len(expected - found)})"
+        print(line)
+    return mbps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=os.path.join(os.path.dirname(__file__), "fixtures"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic-pages", type=int, default=9)
+    parser.add_argument("--asins-per-page", type=int, default=60)
+    parser.add_argument("--min-mbps", type=float, default=0.0, help="exit non-zero if the extractor is slower")
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else []
+    if not pages:
+        print(f"No fixtures in {args.fixtures}; using {args.synthetic_pages} synthetic pages")
+        pages = make_pages(args.synthetic_pages, args.asins_per_page)
+
+    extractor = AsinExtractor()
+    mbps = bench("AsinExtractor (anchor scan)", extractor.extract, pages, args.repeat)
+    legacy_mbps = bench("legacy (6 x re.findall)", legacy_extract, pages, args.repeat)
+    print(f"\nspeedup: {mbps / legacy_mbps:.1f}x")
+
+    if args.min_mbps and mbps < args.min_mbps:
+        print(f"REGRESSION: {mbps:.1f} MB/s < {args.min_mbps:.1f} MB/s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+bench_category_matcher.py - throughput benchmark for category scoring of product titles
+Compares the precompiled CategoryMatcher (token set lookup) with the previous
+implementation, which rebuilt the keyword dict per call and ran a substring scan per keyword.
+
+Titles: one per line from --titles FILE, or deterministic synthetic titles.
+
+Usage: python benchmarks/bench_category_matcher.py [--titles 50000] [--repeat 5]
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from category_matcher import DEFAULT_CATEGORIES, DEFAULT_CATEGORY_KEYWORDS, CategoryMatcher  # noqa: E402
+
+_FILLER = ["Premium", "Pack", "of", "2", "for", "Men", "Women", "Unisex", "Black", "Blue", "Large",
+           "Wireless", "Bluetooth", "Stainless", "Steel", "Combo", "Set", "with", "Warranty", "Edition",
+           "Laptop", "Charger", "Cable", "USB-C", "Smart", "LED", "Bulb", "Headphones", "Speaker"]
+
+
+def legacy_score(product_title: str) -> int:
+    title_lower = (product_title or "").lower()
+    category_keywords = {
+        'Fashion': ['dress', 'shirt', 'trouser', 'fashion', 'clothing', 'apparel'],
+        'Clothing': ['clothing', 'wear', 'fabric', 'cotton', 'silk', 'denim'],
+        'Shoes': ['shoes', 'sneakers', 'boots', 'sandals', 'footwear', 'heel'],
+        'Jewelry': ['jewelry', 'ring', 'necklace', 'earring', 'bracelet', 'chain'],
+        'Watches': ['watch', 'smartwatch', 'timepiece', 'wrist'],
+        'Bags': ['bag', 'backpack', 'handbag', 'purse', 'wallet', 'luggage'],
+        'Home & Kitchen': ['kitchen', 'home', 'cookware', 'utensil', 'furniture', 'decor'],
+        'Sports & Fitness': ['sports', 'fitness', 'gym', 'exercise', 'yoga', 'cricket'],
+        'Beauty & Personal Care': ['beauty', 'cosmetic', 'skincare', 'makeup', 'perfume'],
+        'Toys & Games': ['toy', 'game', 'kids', 'children', 'puzzle', 'doll'],
+        'Books': ['book', 'novel', 'guide', 'textbook', 'story'],
+        'Health & Household': ['health', 'wellness', 'medicine', 'supplement', 'vitamin']
+    }
+    for i, category in enumerate(DEFAULT_CATEGORIES):
+        keywords = category_keywords.get(category, [category.lower()])
+        if any(k in title_lower for k in keywords):
+            return 100 - i
+    return 0
+
+
+def make_titles(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    keywords = sorted({k for kws in DEFAULT_CATEGORY_KEYWORDS.values() for k in kws})
+    titles = []
+    for _ in range(n):
+        words = [rng.choice(_FILLER) for _ in range(rng.randint(6, 16))]
+        # roughly two thirds of titles carry a category keyword, sometimes pluralised
+        if rng.random() < 0.66:
+            kw = rng.choice(keywords)
+            words.insert(rng.randrange(len(words)), kw.capitalize() + rng.choice(["", "", "s"]))
+        titles.append(" ".join(words))
+    return titles
+
+
+def bench(name, fn, titles, repeat):
+    best = float("inf")
+    scores = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        scores = fn(titles)
+        best = min(best, time.perf_counter() - start)
+    rate = len(titles) / best if best > 0 else float("inf")
+    matched = sum(1 for s in scores if s)
+    print(f"{name:<34} {best * 1000:8.1f} ms  {rate / 1000:8.1f} k titles/s  ({matched} matched)")
+    return rate, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", default="50000", help="count of synthetic titles, or a file with one per line")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if Path(args.titles).is_file():
+        titles = Path(args.titles).read_text(encoding="utf-8").splitlines()
+    else:
+        titles = make_titles(int(args.titles))
+
+    start = time.perf_counter()
+    matcher = CategoryMatcher()
+    print(f"{len(titles)} titles; matcher built in {(time.perf_counter() - start) * 1000:.2f} ms\n")
+
+    rate, scores = bench("CategoryMatcher.match_many", lambda ts: [s for _, s in matcher.match_many(ts)],
+                         titles, args.repeat)
+    legacy_rate, legacy_scores = bench("legacy (per-call dict + substrings)", lambda ts: [legacy_score(t) for t in ts],
+                                       titles, args.repeat)
+    print(f"\nspeedup: {rate / legacy_rate:.1f}x")
+
+    # differences are expected: the legacy scan matched inside words ("ring" in "string")
+    diffs = [(t, old, new) for t, old, new in zip(titles, legacy_scores, scores) if old != new]
+    print(f"titles scored differently: {len(diffs)} ({len(diffs) / max(1, len(titles)):.1%})")
+    for title, old, new in diffs[:5]:
+        print(f"  legacy {old:>3} -> {new:>3}  {title}")
+
+
+if __name__ == "__main__":
+    main()
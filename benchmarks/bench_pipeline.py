@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+bench_pipeline.py - offline end-to-end benchmark of process_all_deals_to_telegram
+Runs the real pipeline against local fakes (deals-page server, PA-API, Telegram Bot API)
+and reports end-to-end time, time per stage and peak RSS. No credentials needed.
+
+Usage: python benchmarks/bench_pipeline.py --asins 10000 --pages 100 [--mode async|sequential]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import resource
+import tempfile
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+sys.path.insert(0, str(HERE))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--asins", type=int, default=10000, help="distinct ASINs spread across the fake pages")
+    parser.add_argument("--pages", type=int, default=100, help="number of fake deals pages")
+    parser.add_argument("--fixtures", help="serve recorded *.html / *.html.gz pages from this directory instead")
+    parser.add_argument("--max-products", type=int, default=None, help="defaults to --asins")
+    parser.add_argument("--mode", choices=["async", "sequential"], default="async")
+    parser.add_argument("--concurrency", type=int, default=8, help="DEALS_CONCURRENCY for page fetches")
+    parser.add_argument("--page-latency", type=float, default=0.05)
+    parser.add_argument("--paapi-latency", type=float, default=0.2)
+    parser.add_argument("--paapi-tps", type=float, default=10.0, help="fake PA-API throttles above this")
+    parser.add_argument("--paapi-error-rate", type=float, default=0.0)
+    parser.add_argument("--telegram-latency", type=float, default=0.02)
+    parser.add_argument("--telegram-rate", type=float, default=6000, help="fake per-chat limit, msgs/min")
+    parser.add_argument("--data-dir", help="reuse state between runs (default: fresh temp dir)")
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="deals-bench-")
+
+    from fakes import FakeAmazonApi, FakeServer
+
+    server = FakeServer(total_asins=args.asins, pages=args.pages, page_latency=args.page_latency,
+                        fixtures_dir=args.fixtures, telegram_latency=args.telegram_latency,
+                        telegram_chat_rate_per_min=args.telegram_rate).start()
+
+    # main.py reads its configuration from the environment at import time
+    # (set explicitly so a local .env cannot skew the numbers)
+    os.environ.update({
+        "DEALS_CONCURRENCY": str(args.concurrency),
+        "BATCH_SIZE": "10",
+        "DELAY_BETWEEN_MESSAGES": "0",
+        "DEALS_DATA_DIR": data_dir,
+        "EXPORT_DIR": data_dir,
+        "LOG_FILE": os.path.join(data_dir, "bench.log"),
+        "TELEGRAM_API_BASE": server.telegram_api_base,
+        "TELEGRAM_CHAT_RATE_PER_MIN": str(args.telegram_rate),
+        "TELEGRAM_GLOBAL_RATE_PER_SEC": str(max(30.0, args.telegram_rate / 60)),
+        "TELEGRAM_CHAT_BURST": "10",
+        "TELEGRAM_RETRY_BASE_DELAY": "1",
+        "TELEGRAM_RETRY_DRAIN_SECONDS": "10",
+        "PAAPI_MAX_RATE": str(args.paapi_tps * 2),
+        "PAGE_CACHE": "1",
+    })
+    import main as bot_main
+    from metrics import registry
+
+    bot_main.setup_logging()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    amazon = FakeAmazonApi(latency=args.paapi_latency, tps=args.paapi_tps, error_rate=args.paapi_error_rate)
+    bot = bot_main.AmazonTelegramDealsBot("bench-token", "@bench", amazon_client=amazon)
+    bot.paapi.base_delay = 0.2
+    bot.deals_urls = server.deals_urls()
+
+    start = time.perf_counter()
+    try:
+        bot.process_all_deals_to_telegram(max_products=args.max_products or args.asins, pipeline_mode=args.mode)
+    finally:
+        bot.close()
+        server.stop()
+    elapsed = time.perf_counter() - start
+
+    stages = {dict(key).get("stage"): hist["sum"]
+              for key, hist in registry.values.get("deals_stage_seconds", {}).items()}
+    report = {
+        "mode": args.mode,
+        "asins": args.asins,
+        "pages": args.pages,
+        "end_to_end_seconds": round(elapsed, 3),
+        "stage_seconds": {k: round(v, 3) for k, v in stages.items()},
+        "telegram_sent": server.sent,
+        "telegram_429s": server.rate_limited,
+        "paapi_calls": amazon.calls,
+        "paapi_throttled": amazon.throttled,
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_children_mb": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+        "data_dir": data_dir,
+    }
+    print(json.dumps(report, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+bench_ranking.py - ranking benchmark over a large synthetic candidate set
+Times building the columnar ProductTable (in one go, and incrementally in GetItems-sized
+batches as a run fills it) and selecting the top K with the Ranker
+(default and all-terms weights, with and without a category quota), against the
+previous full sort of the products by category_score * 2 + discount_percentage.
+
+Usage: python benchmarks/bench_ranking.py [--rows 100000] [--k 200] [--repeat 5]
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from category_matcher import DEFAULT_CATEGORIES  # noqa: E402
+from product import Product  # noqa: E402
+from ranking import ProductTable, Ranker, RankWeights  # noqa: E402
+
+
+def make_products(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    now = time.time()
+    products = []
+    for i in range(n):
+        mrp = float(rng.randint(199, 19999))
+        discount = rng.uniform(10, 80)
+        category = rng.choice(DEFAULT_CATEGORIES + [None])
+        products.append(Product(
+            f"B0{i:08d}", None, round(mrp * (1 - discount / 100), 2), mrp,
+            category=category,
+            category_score=100 - DEFAULT_CATEGORIES.index(category) if category else 0,
+            seen_at=now - rng.uniform(0, 7 * 86400),
+        ))
+    return products
+
+
+def best_of(repeat, fn):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--k", type=int, default=200)
+    parser.add_argument("--quota", type=int, default=20, help="per-category quota for the quota runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    products = make_products(args.rows)
+    build_ms, table = best_of(args.repeat, lambda: ProductTable(products))
+    print(f"{args.rows} products, top {args.k}")
+    print(f"{'ProductTable build':<40} {build_ms:8.1f} ms")
+
+    def incremental():
+        t = ProductTable()
+        for i in range(0, len(products), 10):
+            t.extend(products[i:i + 10])
+        return t
+
+    append_ms, _ = best_of(args.repeat, incremental)
+    print(f"{'ProductTable extend, batches of 10':<40} {append_ms:8.1f} ms  (spread over the enrich stage)")
+
+    legacy_ms, legacy = best_of(args.repeat, lambda: sorted(
+        products, key=lambda p: p.category_score * 2 + p.discount_percentage, reverse=True)[:args.k])
+    print(f"{'legacy full sort':<40} {legacy_ms:8.1f} ms")
+
+    all_terms = RankWeights(category=2, discount=1, saving=5, price_band=10, freshness=20)
+    for label, ranker in (
+        ("Ranker default weights", Ranker()),
+        ("Ranker default weights + quota", Ranker(category_quota=args.quota)),
+        ("Ranker all terms", Ranker(all_terms, price_band=(299, 4999))),
+        ("Ranker all terms + quota", Ranker(all_terms, price_band=(299, 4999), category_quota=args.quota)),
+    ):
+        ms, top = best_of(args.repeat, lambda: ranker.top(table, args.k))
+        print(f"{label:<40} {ms:8.1f} ms  ({len(top)} selected)")
+        if ranker.weights == RankWeights() and not ranker.category_quota:
+            assert [p.asin for p in top] == [p.asin for p in legacy], "default ranking differs from legacy sort"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+bench_startup.py - import-time budget for main.py
+Runs `python -X importtime -c "import main"` in fresh interpreters and reports the
+cumulative import time of main (median of the runs) with its slowest imports.
+Fails (exit 1) when the median exceeds the budget, when a dependency that should
+load lazily (aiohttp, requests, amazon_paapi, dotenv, the process pool) or the
+removed bs4 is imported, or when the import creates the data directory or log file.
+
+Usage: python benchmarks/bench_startup.py [--budget-ms 150] [--repeat 5] [--top 10]
+"""
+
+import os
+import re
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+LAZY_MODULES = ("aiohttp", "requests", "amazon_paapi", "dotenv", "bs4", "concurrent.futures.process")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def import_profile(env: dict):
+    """One fresh interpreter: {module: (self_us, cumulative_us, depth)} for every import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=str(ROOT), env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        errors = "\n".join(line for line in proc.stderr.splitlines() if not line.startswith("import time:"))
+        raise SystemExit(f"import main failed:\n{errors}")
+    profile = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            profile[m.group(4)] = (int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2)
+    return profile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="max median cumulative import time of main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="deals-startup-") as tmp:
+        data_dir = os.path.join(tmp, "data")
+        log_file = os.path.join(tmp, "logs", "bot.log")
+        env = dict(os.environ, DEALS_DATA_DIR=data_dir, LOG_FILE=log_file, PYTHONDONTWRITEBYTECODE="1")
+        import_profile(env)  # warm the bytecode and filesystem caches
+        runs = [import_profile(env) for _ in range(args.repeat)]
+        side_effects = [p for p in (data_dir, log_file) if os.path.exists(p)]
+
+    totals = [run["main"][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals)
+    last = runs[-1]
+    # direct imports of main, slowest first; importtime prints children before their
+    # parent, so walk back from main to the previous top-level line
+    start = list(last).index("main")
+    children = []
+    for name, (_, cumulative, depth) in reversed(list(last.items())[:start]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative, name))
+
+    print(f"import main: median {median_ms:.1f} ms over {args.repeat} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}), budget {args.budget_ms:.0f} ms")
+    for cumulative, name in sorted(children, reverse=True)[:args.top]:
+        print(f"  {name:<30} {cumulative / 1000:8.1f} ms")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    eager = [m for m in LAZY_MODULES if any(m in run for run in runs)]
+    if eager:
+        failures.append(f"imported at startup (should be lazy): {', '.join(eager)}")
+    if side_effects:
+        failures.append(f"import created {', '.join(side_effects)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
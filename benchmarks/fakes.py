@@ -0,0 +1,189 @@
+"""
+fakes.py - local stand-ins for Amazon deals pages, PA-API and the Telegram Bot API
+Used by bench_pipeline.py so the full pipeline can run without credentials.
+"""
+
+import gzip
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from pathlib import Path
+from types import SimpleNamespace
+
+from aiohttp import web
+from amazon_paapi.errors import RequestError, TooManyRequests
+
+from synthetic import make_asin, make_deals_page
+
+_WORDS = ["Cotton", "Shirt", "Smart", "Watch", "Kitchen", "Cookware", "Yoga", "Mat", "Novel",
+          "Backpack", "Perfume", "Puzzle", "Sneakers", "Necklace", "Vitamin", "Laptop", "Stand"]
+
+
+class _SlidingWindow:
+    """At most `limit` events per `window` seconds; thread-safe."""
+
+    def __init__(self, limit: float, window: float = 1.0):
+        self.limit = limit
+        self.window = window
+        self.events = deque()
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            while self.events and self.events[0] <= now - self.window:
+                self.events.popleft()
+            if len(self.events) >= self.limit:
+                return False
+            self.events.append(now)
+            return True
+
+
+class FakeAmazonApi:
+    """
+    Duck-types AmazonApi.get_items: returns synthetic items shaped like amazon_paapi
+    models, after `latency` seconds, and raises TooManyRequests above `tps`.
+    """
+
+    def __init__(self, latency: float = 0.2, tps: float = 5.0, error_rate: float = 0.0,
+                 deal_ratio: float = 0.7, seed: int = 0):
+        self.latency = latency
+        self.window = _SlidingWindow(tps)
+        self.error_rate = error_rate
+        self.deal_ratio = deal_ratio
+        self.seed = seed
+        self.calls = 0
+        self.throttled = 0
+
+    def _item(self, asin: str):
+        rng = random.Random(f"{self.seed}-{asin}")
+        mrp = float(rng.randint(199, 19999))
+        discount = rng.uniform(0.12, 0.8) if rng.random() < self.deal_ratio else rng.uniform(0.0, 0.08)
+        amount = lambda value: SimpleNamespace(amount=round(value, 2))  # noqa: E731
+        return SimpleNamespace(
+            asin=asin,
+            item_info=SimpleNamespace(title=SimpleNamespace(
+                display_value=" ".join(rng.choice(_WORDS) for _ in range(6)))),
+            images=SimpleNamespace(primary=SimpleNamespace(large=SimpleNamespace(
+                url=f"https://m.media-amazon.com/images/I/{asin}.jpg"))),
+            offers=SimpleNamespace(listings=[SimpleNamespace(
+                price=amount(mrp * (1 - discount)),
+                saving_basis=amount(mrp),
+                availability=SimpleNamespace(message="In stock"),
+            )]),
+        )
+
+    def get_items(self, asins, **kwargs):
+        self.calls += 1
+        if not self.window.allow():
+            self.throttled += 1
+            raise TooManyRequests("Requests limit reached")
+        time.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            raise RequestError("Request failed: simulated")
+        return [self._item(a) for a in asins]
+
+
+class FakeServer:
+    """
+    One aiohttp app on 127.0.0.1 serving:
+      /s?page=N            deals pages (generated, or recorded fixtures round-robin)
+      /bot<token>/<method> Telegram Bot API subset with per-chat rate limits (429 + retry_after)
+    Runs on its own event loop thread so the bot can keep calling asyncio.run().
+    """
+
+    def __init__(self, total_asins: int = 10000, pages: int = 100, page_latency: float = 0.05,
+                 fixtures_dir: str = None, telegram_latency: float = 0.02,
+                 telegram_chat_rate_per_min: float = 6000, seed: int = 0):
+        rng = random.Random(seed)
+        self.asins = [make_asin(rng) for _ in range(total_asins)]
+        self.pages = max(1, pages)
+        self.page_latency = page_latency
+        self.fixtures = [gzip.decompress(p.read_bytes()).decode("utf-8", "replace") if p.suffix == ".gz"
+                         else p.read_text(encoding="utf-8", errors="replace")
+                         for p in sorted(Path(fixtures_dir).glob("*.html*"))] if fixtures_dir else []
+        self.telegram_latency = telegram_latency
+        self.chat_windows = {}
+        self.chat_rate = telegram_chat_rate_per_min
+        self.sent = 0
+        self.rate_limited = 0
+        self.port = None
+        self._page_cache = {}
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    # ---------- handlers ----------
+    def _page_html(self, n: int) -> str:
+        if self.fixtures:
+            return self.fixtures[n % len(self.fixtures)]
+        html = self._page_cache.get(n)
+        if html is None:
+            per_page = -(-len(self.asins) // self.pages)
+            html = make_deals_page(self.asins[n * per_page:(n + 1) * per_page], seed=n, noise_kb=1)
+            self._page_cache[n] = html
+        return html
+
+    async def _deals_page(self, request):
+        await asyncio.sleep(self.page_latency)
+        n = int(request.query.get("page", "1")) - 1
+        return web.Response(text=self._page_html(n), content_type="text/html")
+
+    async def _telegram(self, request):
+        method = request.match_info["method"]
+        if method == "getMe":
+            return web.json_response({"ok": True, "result": {"username": "fake_deals_bot"}})
+        data = await request.post()
+        chat_id = data.get("chat_id")
+        window = self.chat_windows.get(chat_id)
+        if window is None:
+            window = self.chat_windows[chat_id] = _SlidingWindow(self.chat_rate, 60.0)
+        await asyncio.sleep(self.telegram_latency)
+        if not window.allow():
+            self.rate_limited += 1
+            return web.json_response({"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                      "parameters": {"retry_after": 1}}, status=429)
+        self.sent += 1
+        return web.json_response({"ok": True, "result": {"message_id": self.sent}})
+
+    # ---------- lifecycle ----------
+    def deals_urls(self):
+        return [f"http://127.0.0.1:{self.port}/s?k=deals&page={n}" for n in range(1, self.pages + 1)]
+
+    @property
+    def telegram_api_base(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/s", self._deals_page)
+        app.router.add_route("*", "/bot{token}/{method}", self._telegram)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="fake-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -0,0 +1,42 @@
+"""
+synthetic.py - deterministic stand-in HTML for Amazon deals pages
+Used by the benchmarks when no saved fixtures are available.
+"""
+
+import random
+import string
+
+_ALNUM = string.ascii_uppercase + string.digits
+
+
+def make_asin(rng: random.Random) -> str:
+    return "B0" + "".join(rng.choice(_ALNUM) for _ in range(8))
+
+
+def make_deals_page(asins, seed: int = 0, noise_kb: int = 2) -> str:
+    """Render a page that mentions each ASIN the ways real deals/search pages do."""
+    rng = random.Random(seed)
+    parts = ["<!doctype html><html><head><title>Deals</title></head><body>"]
+    for asin in asins:
+        slug = "-".join(rng.choice(["Cotton", "Shirt", "Smart", "Watch", "Kitchen", "Set", "Pack"]) for _ in range(4))
+        testid = "".join(rng.choice(_ALNUM + string.ascii_lowercase + "-_") for _ in range(60))
+        parts.append(
+            f'<div data-asin="{asin}" data-component-type="s-search-result" data-csa-c-asin="{asin}">'
+            f'<a class="a-link-normal" href="/{slug}/dp/{asin}/ref=sr_1_{rng.randint(1, 60)}?th=1">'
+            f'<span data-testid="{testid}">{slug.replace("-", " ")}</span></a>'
+            f'<span class="a-price"><span class="a-offscreen">&#8377;{rng.randint(99, 9999)}</span></span>'
+            f'<script type="application/json">{{"asin":"{asin}","dealId":"{testid[:12]}"}}</script>'
+            f'</div>'
+        )
+        parts.append("<p>" + "".join(rng.choice(string.ascii_letters + " ") for _ in range(noise_kb * 1024)) + "</p>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def make_pages(n_pages: int, asins_per_page: int, seed: int = 0):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(n_pages):
+        asins = [make_asin(rng) for _ in range(asins_per_page)]
+        pages.append((f"synthetic-{i}", make_deals_page(asins, seed=seed + i), set(asins)))
+    return pages
@@ -0,0 +1,88 @@
+"""
+category_matcher.py - keyword -> high-commission category scoring for product titles
+Features:
+ - Keyword table (with plural s/es forms) compiled once into a set at startup
+ - Whole-word matches only ("wear" no longer matches "footwear"), multi-word keywords supported
+ - One tokenising regex pass + a set intersection per title, plus a batch API
+ - Category order and keywords loadable from a JSON config file
+"""
+
+import re
+import json
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("amazon_deals_bot")
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# high commission categories (priority order): score is 100 - position
+DEFAULT_CATEGORIES = [
+    'Fashion', 'Clothing', 'Shoes', 'Jewelry', 'Watches', 'Bags',
+    'Home & Kitchen', 'Sports & Fitness', 'Beauty & Personal Care',
+    'Toys & Games', 'Books', 'Health & Household', 'Electronics', 'Computers', 'Mobile Phones'
+]
+
+DEFAULT_CATEGORY_KEYWORDS = {
+    'Fashion': ['dress', 'shirt', 'trouser', 'fashion', 'clothing', 'apparel'],
+    'Clothing': ['clothing', 'wear', 'fabric', 'cotton', 'silk', 'denim'],
+    'Shoes': ['shoes', 'sneakers', 'boots', 'sandals', 'footwear', 'heel'],
+    'Jewelry': ['jewelry', 'ring', 'necklace', 'earring', 'bracelet', 'chain'],
+    'Watches': ['watch', 'smartwatch', 'timepiece', 'wrist'],
+    'Bags': ['bag', 'backpack', 'handbag', 'purse', 'wallet', 'luggage'],
+    'Home & Kitchen': ['kitchen', 'home', 'cookware', 'utensil', 'furniture', 'decor'],
+    'Sports & Fitness': ['sports', 'fitness', 'gym', 'exercise', 'yoga', 'cricket'],
+    'Beauty & Personal Care': ['beauty', 'cosmetic', 'skincare', 'makeup', 'perfume'],
+    'Toys & Games': ['toy', 'game', 'kids', 'children', 'puzzle', 'doll'],
+    'Books': ['book', 'novel', 'guide', 'textbook', 'story'],
+    'Health & Household': ['health', 'wellness', 'medicine', 'supplement', 'vitamin']
+}
+
+
+class CategoryMatcher:
+    def __init__(self, categories: List[str] = None, keywords: Dict[str, List[str]] = None):
+        self.categories = list(categories or DEFAULT_CATEGORIES)
+        keywords = DEFAULT_CATEGORY_KEYWORDS if keywords is None else keywords
+
+        # keyword (and its plural forms) -> index of the highest-priority category that lists it
+        self.keyword_rank = {}
+        self.phrase_rank = []  # multi-word keywords, matched on the normalised token string
+        for i, category in enumerate(self.categories):
+            for kw in keywords.get(category, [category.lower()]):
+                tokens = _TOKEN.findall(kw.lower())
+                if len(tokens) > 1:
+                    self.phrase_rank.append((" " + " ".join(tokens) + " ", i))
+                elif tokens:
+                    for form in (tokens[0], tokens[0] + "s", tokens[0] + "es"):
+                        self.keyword_rank.setdefault(form, i)
+        self.keyword_set = frozenset(self.keyword_rank)
+
+    @classmethod
+    def from_file(cls, path: str) -> "CategoryMatcher":
+        """JSON: {"categories": [... priority order ...], "keywords": {category: [...]}}"""
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config.get("categories"), config.get("keywords"))
+
+    def match(self, title: Optional[str]) -> Tuple[Optional[str], int]:
+        """Best (category, score) for a title; (None, 0) when nothing matches."""
+        if not title:
+            return None, 0
+        tokens = _TOKEN.findall(title.lower())
+        hits = self.keyword_set.intersection(tokens)
+        best = min(map(self.keyword_rank.__getitem__, hits), default=None)
+        if self.phrase_rank:
+            padded = " " + " ".join(tokens) + " "
+            for phrase, rank in self.phrase_rank:
+                if (best is None or rank < best) and phrase in padded:
+                    best = rank
+        if best is None:
+            return None, 0
+        return self.categories[best], 100 - best
+
+    def score(self, title: Optional[str]) -> int:
+        return self.match(title)[1]
+
+    def match_many(self, titles: Iterable[Optional[str]]) -> List[Tuple[Optional[str], int]]:
+        match = self.match
+        return [match(t) for t in titles]
@@ -0,0 +1,258 @@
+"""
+dedup_store.py - persistent "already sent" state for the deals bot
+Features:
+ - Pluggable store behind is_product_already_sent / mark_product_as_sent
+ - SQLite backend (default) with an index on the sent timestamp
+ - Append-only log backend with periodic compaction
+ - Batched commits instead of a full rewrite per send
+ - TTL expiry done in storage (no full scan + fromisoformat at startup)
+ - One-shot migration from the legacy sent_products.json format
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger("amazon_deals_bot")
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+class SentStore(ABC):
+    """Base class: maps ASIN -> epoch seconds of the last successful send."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, batch_size: int = 20):
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = max(1, batch_size)
+        self._pending: Dict[str, float] = {}
+
+    # ---------- public API ----------
+    def contains(self, asin: str) -> bool:
+        if asin in self._pending:
+            return True
+        return self._contains(asin, time.time() - self.ttl_seconds)
+
+    def __contains__(self, asin: str) -> bool:
+        return self.contains(asin)
+
+    def filter_unsent(self, asins: Iterable[str]) -> List[str]:
+        return [a for a in asins if not self.contains(a)]
+
+    def mark(self, asin: str, sent_at: float = None):
+        self._pending[asin] = sent_at if sent_at is not None else time.time()
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            self._write(pending)
+        except Exception as e:
+            # keep the entries so the next flush can retry them
+            self._pending.update(pending)
+            logger.exception("Error saving sent products: %s", e)
+
+    def expire(self) -> int:
+        return self._expire(time.time() - self.ttl_seconds)
+
+    def close(self):
+        self.flush()
+
+    def __len__(self) -> int:
+        return self._count(time.time() - self.ttl_seconds) + len(self._pending)
+
+    # ---------- backend hooks ----------
+    @abstractmethod
+    def _contains(self, asin: str, cutoff: float) -> bool:
+        ...
+
+    @abstractmethod
+    def _write(self, entries: Dict[str, float]):
+        ...
+
+    @abstractmethod
+    def _expire(self, cutoff: float) -> int:
+        ...
+
+    @abstractmethod
+    def _count(self, cutoff: float) -> int:
+        ...
+
+
+class SqliteSentStore(SentStore):
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sent_products (asin TEXT PRIMARY KEY, sent_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sent_products_sent_at ON sent_products(sent_at)")
+        self.conn.commit()
+
+    def _contains(self, asin, cutoff):
+        row = self.conn.execute(
+            "SELECT 1 FROM sent_products WHERE asin = ? AND sent_at >= ?", (asin, cutoff)
+        ).fetchone()
+        return row is not None
+
+    def filter_unsent(self, asins):
+        asins = list(asins)
+        cutoff = time.time() - self.ttl_seconds
+        sent = set(self._pending)
+        # stay well below SQLITE_MAX_VARIABLE_NUMBER
+        for i in range(0, len(asins), 500):
+            chunk = asins[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT asin FROM sent_products WHERE sent_at >= ? AND asin IN ({marks})", [cutoff, *chunk]
+            )
+            sent.update(r[0] for r in rows)
+        return [a for a in asins if a not in sent]
+
+    def _write(self, entries):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sent_products (asin, sent_at) VALUES (?, ?)", entries.items()
+            )
+
+    def _expire(self, cutoff):
+        with self.conn:
+            cur = self.conn.execute("DELETE FROM sent_products WHERE sent_at < ?", (cutoff,))
+        return cur.rowcount
+
+    def _count(self, cutoff):
+        return self.conn.execute("SELECT COUNT(*) FROM sent_products WHERE sent_at >= ?", (cutoff,)).fetchone()[0]
+
+    def close(self):
+        super().close()
+        self.conn.close()
+
+
+class AppendLogSentStore(SentStore):
+    """
+    One "ASIN<TAB>epoch" line per send. The live set is held in memory; the log
+    is rewritten (tmp file + rename) once dead lines outnumber live ones.
+    """
+
+    def __init__(self, path: str, compact_ratio: float = 1.0, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.entries: Dict[str, float] = {}
+        self.log_lines = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        cutoff = time.time() - self.ttl_seconds
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                self.log_lines += 1
+                asin, _, ts = line.rstrip("\n").partition("\t")
+                try:
+                    sent_at = float(ts)
+                except ValueError:
+                    # torn final line from an interrupted append
+                    continue
+                if sent_at >= cutoff:
+                    self.entries[asin] = sent_at
+        self._maybe_compact()
+
+    def _contains(self, asin, cutoff):
+        sent_at = self.entries.get(asin)
+        return sent_at is not None and sent_at >= cutoff
+
+    def _write(self, entries):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{asin}\t{sent_at:.3f}\n" for asin, sent_at in entries.items())
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries.update(entries)
+        self.log_lines += len(entries)
+        self._maybe_compact()
+
+    def _expire(self, cutoff):
+        stale = [a for a, ts in self.entries.items() if ts < cutoff]
+        for a in stale:
+            del self.entries[a]
+        self._maybe_compact()
+        return len(stale)
+
+    def _count(self, cutoff):
+        return sum(1 for ts in self.entries.values() if ts >= cutoff)
+
+    def _maybe_compact(self):
+        dead = self.log_lines - len(self.entries)
+        if dead > max(100, len(self.entries) * self.compact_ratio):
+            self.compact()
+
+    def compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.writelines(f"{asin}\t{sent_at:.3f}\n" for asin, sent_at in self.entries.items())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        logger.info("Compacted sent log %s: %d -> %d lines", self.path, self.log_lines, len(self.entries))
+        self.log_lines = len(self.entries)
+
+
+# ---------- legacy migration ----------
+def migrate_legacy_json(store: SentStore, json_path: str) -> int:
+    """Import an old {asin: isoformat} sent_products.json once, then rename it."""
+    if not os.path.exists(json_path):
+        return 0
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except Exception as e:
+        logger.exception("Error reading legacy sent products %s: %s", json_path, e)
+        return 0
+
+    cutoff = time.time() - store.ttl_seconds
+    entries = {}
+    for asin, iso in data.items():
+        try:
+            ts = datetime.fromisoformat(iso).timestamp()
+        except (TypeError, ValueError):
+            continue
+        if ts >= cutoff:
+            entries[asin] = ts
+    if entries:
+        store._write(entries)
+    os.replace(json_path, json_path + ".migrated")
+    logger.info("Migrated %d sent products from %s", len(entries), json_path)
+    return len(entries)
+
+
+def open_sent_store(data_dir: str, backend: str = "sqlite", ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                    batch_size: int = 20, legacy_json: str = None, read_only: bool = False) -> SentStore:
+    """read_only (dry runs) skips the legacy import and expiry, so opening the store changes nothing."""
+    if backend == "sqlite":
+        store = SqliteSentStore(os.path.join(data_dir, "sent_products.sqlite3"),
+                                ttl_seconds=ttl_seconds, batch_size=batch_size)
+    elif backend == "log":
+        store = AppendLogSentStore(os.path.join(data_dir, "sent_products.log"),
+                                   ttl_seconds=ttl_seconds, batch_size=batch_size)
+    else:
+        raise ValueError(f"Unknown dedup backend: {backend}")
+
+    if read_only:
+        return store
+    if legacy_json:
+        migrate_legacy_json(store, legacy_json)
+    expired = store.expire()
+    if expired:
+        logger.info("Expired %d sent products older than %.1f days", expired, ttl_seconds / 86400)
+    return store
@@ -0,0 +1,254 @@
+"""
+exporters.py - streaming export of enriched deals to CSV / JSON / text sinks
+Features:
+ - Every product is written to all sinks as it is produced (nothing held in memory)
+ - Line-buffered CSV, JSON Lines and plain-text lists; JSON array built from the JSONL at finalise
+ - Atomic: each sink is written to a temp file and renamed into place on finalise
+ - Incremental mode: previous export kept, only ASINs not exported before are appended; the
+   run's segment is appended on finalise (no copy of the history), under a size journal so an
+   interrupted append is rolled back on the next open
+ - Optional gzip JSONL history partition per run for long-term analysis, pruned after N days
+"""
+
+import os
+import csv
+import gzip
+import json
+import time
+import shutil
+import logging
+from typing import Optional
+
+logger = logging.getLogger("amazon_deals_bot")
+
+SUMMARY_CSV = "amazon_deals_summary.csv"
+DETAILED_JSON = "amazon_deals_detailed.json"
+DETAILED_JSONL = "amazon_deals_detailed.jsonl"
+ASINS_TXT = "amazon_deals_asins.txt"
+AFFILIATE_URLS_TXT = "amazon_deals_affiliate_urls.txt"
+HISTORY_DIR = "history"
+APPEND_JOURNAL = ".export_append.json"  # sink sizes before an incremental append, removed once it completes
+
+CSV_COLUMNS = ["ASIN", "Title", "Current_Price", "MRP", "Discount", "Availability", "Affiliate_URL"]
+
+
+def summary_row(product) -> list:
+    """One amazon_deals_summary.csv row (title shortened, commas swapped for ';' as before)."""
+    title = (product.title or "")[:100].replace(",", ";")
+    discount = "N/A"
+    if product.mrp_amount:
+        discount = f"{product.currency}{product.discount_amount:.2f} ({product.discount_percentage:.1f}% off)"
+    return [product.asin, title, product.current_price, product.mrp, discount,
+            product.availability or "N/A", product.affiliate_url]
+
+
+class DealsExporter:
+    def __init__(self, directory: str = ".", incremental: bool = False, history: bool = False,
+                 history_retention_days: float = 30):
+        self.directory = directory
+        self.incremental = incremental
+        self.history = history
+        self.history_retention_days = history_retention_days  # 0 = keep every partition
+        self.exported = set()  # ASINs already in the sinks (previous export in incremental mode, then this run)
+        self.written = 0
+        self._append = False  # temp files hold only this run's segment, appended to the sinks on finalise
+        self._files = {}
+        self._csv = None
+        self._history_name = None
+        self._history_file = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _open(self, name: str, newline: str = None):
+        """Open name.tmp line-buffered: the whole export, or in incremental mode this run's segment."""
+        f = open(self._path(name) + ".tmp", "w", encoding="utf-8", buffering=1, newline=newline)
+        self._files[name] = f
+        return f
+
+    # ---------- lifecycle ----------
+    def open(self) -> "DealsExporter":
+        os.makedirs(self.directory, exist_ok=True)
+        self._recover_append()
+        # incremental needs the JSONL log of the previous export to extend the JSON array
+        self._append = self.incremental and os.path.exists(self._path(DETAILED_JSONL))
+        if self._append and os.path.exists(self._path(ASINS_TXT)):
+            with open(self._path(ASINS_TXT), "r", encoding="utf-8") as f:
+                self.exported = {line.strip() for line in f if line.strip()}
+
+        self._csv = csv.writer(self._open(SUMMARY_CSV, newline=""))
+        if not (self._append and os.path.exists(self._path(SUMMARY_CSV))):
+            self._csv.writerow(CSV_COLUMNS)
+        self._open(DETAILED_JSONL)
+        self._open(ASINS_TXT)
+        self._open(AFFILIATE_URLS_TXT)
+
+        if self.history:
+            os.makedirs(self._path(HISTORY_DIR), exist_ok=True)
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            self._history_name = os.path.join(HISTORY_DIR, f"amazon_deals_{stamp}-{os.getpid()}.jsonl.gz")
+            self._history_file = gzip.open(self._path(self._history_name) + ".tmp", "wt", encoding="utf-8")
+        return self
+
+    def write(self, product):
+        if product.asin in self.exported:
+            return
+        self.exported.add(product.asin)
+        record = json.dumps(product.to_dict(), ensure_ascii=False)
+        self._csv.writerow(summary_row(product))
+        self._files[DETAILED_JSONL].write(record + "\n")
+        self._files[ASINS_TXT].write(product.asin + "\n")
+        self._files[AFFILIATE_URLS_TXT].write(product.affiliate_url + "\n")
+        if self._history_file is not None:
+            self._history_file.write(record + "\n")
+        self.written += 1
+
+    def _write_json_array(self, jsonl_path: str, json_path: str):
+        """Stream a JSONL log into a JSON array, one record at a time."""
+        with open(jsonl_path, "r", encoding="utf-8") as src, open(json_path, "w", encoding="utf-8") as dst:
+            dst.write("[")
+            first = True
+            for line in src:
+                line = line.strip()
+                if not line:
+                    continue
+                dst.write("\n  " + line if first else ",\n  " + line)
+                first = False
+            dst.write("\n]\n" if not first else "]\n")
+
+    def _extend_json_array(self, segment_path: str):
+        """Append the segment's records to the JSON array in place: only its closing bracket is rewritten."""
+        path = self._path(DETAILED_JSON)
+        with open(path, "r+b") as dst, open(segment_path, "rb") as src:
+            dst.seek(0, os.SEEK_END)
+            size = dst.tell()
+            dst.seek(max(0, size - 3))
+            tail = dst.read()
+            if tail == b"\n]\n":
+                dst.seek(size - 3)
+                sep = b",\n  "
+            elif size == 3 and tail == b"[]\n":
+                dst.seek(1)
+                sep = b"\n  "
+            else:
+                return False
+            for line in src:
+                line = line.strip()
+                if line:
+                    dst.write(sep + line)
+                    sep = b",\n  "
+            dst.write(b"\n]\n" if sep == b",\n  " else b"]\n")
+            dst.truncate()
+            dst.flush()
+            os.fsync(dst.fileno())
+        return True
+
+    def _append_segments(self):
+        """Append each temp segment to its sink; sizes are journaled first so a crash can be rolled back."""
+        names = [*self._files, DETAILED_JSON]
+        sizes = {name: os.path.getsize(self._path(name)) if os.path.exists(self._path(name)) else 0 for name in names}
+        journal = self._path(APPEND_JOURNAL)
+        with open(journal + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(sizes, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(journal + ".tmp", journal)
+
+        segment_jsonl = self._path(DETAILED_JSONL) + ".tmp"
+        for name in self._files:
+            with open(self._path(name) + ".tmp", "rb") as src, open(self._path(name), "ab") as dst:
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+        if not (os.path.exists(self._path(DETAILED_JSON)) and self._extend_json_array(segment_jsonl)):
+            self._write_json_array(self._path(DETAILED_JSONL), self._path(DETAILED_JSON) + ".tmp")
+            os.replace(self._path(DETAILED_JSON) + ".tmp", self._path(DETAILED_JSON))
+        for name in self._files:
+            os.remove(self._path(name) + ".tmp")
+        os.remove(journal)
+
+    def _recover_append(self):
+        """Roll back an incremental append interrupted by a crash (sinks truncated to their journaled sizes)."""
+        journal = self._path(APPEND_JOURNAL)
+        if not os.path.exists(journal):
+            return
+        with open(journal, "r", encoding="utf-8") as f:
+            sizes = json.load(f)
+        for name, size in sizes.items():
+            if name != DETAILED_JSON and os.path.exists(self._path(name)):
+                with open(self._path(name), "r+b") as f:
+                    f.truncate(size)
+        # the array's closing bracket was already overwritten, so rebuild it from the restored log
+        if os.path.exists(self._path(DETAILED_JSONL)):
+            self._write_json_array(self._path(DETAILED_JSONL), self._path(DETAILED_JSON) + ".tmp")
+            os.replace(self._path(DETAILED_JSON) + ".tmp", self._path(DETAILED_JSON))
+        os.remove(journal)
+        logger.warning("Rolled back an interrupted incremental export in %s", os.path.abspath(self.directory))
+
+    def _prune_history(self):
+        if not self.history_retention_days:
+            return
+        cutoff = time.time() - self.history_retention_days * 86400
+        directory = self._path(HISTORY_DIR)
+        removed = 0
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".jsonl.gz") and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        if removed:
+            logger.info("Pruned %d export history partitions older than %g days", removed, self.history_retention_days)
+
+    def finalize(self):
+        """Close every sink and move the temp files into place (renamed, or appended in incremental mode)."""
+        if not self._files:
+            return
+        for f in self._files.values():
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        if self._append:
+            self._append_segments()
+        else:
+            self._write_json_array(self._path(DETAILED_JSONL) + ".tmp", self._path(DETAILED_JSON) + ".tmp")
+            for name in [*self._files, DETAILED_JSON]:
+                os.replace(self._path(name) + ".tmp", self._path(name))
+        self._files = {}
+        if self._history_file is not None:
+            self._history_file.close()
+            os.replace(self._path(self._history_name) + ".tmp", self._path(self._history_name))
+            self._history_file = None
+            self._prune_history()
+        logger.info("Exported %d products to %s (%s)", self.written, os.path.abspath(self.directory),
+                    "incremental" if self.incremental else "full run")
+
+    def abort(self):
+        """Drop the temp files; the previous export stays in place."""
+        for name, f in self._files.items():
+            f.close()
+            os.remove(self._path(name) + ".tmp")
+        self._files = {}
+        if self._history_file is not None:
+            self._history_file.close()
+            os.remove(self._path(self._history_name) + ".tmp")
+            self._history_file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finalize()
+        else:
+            self.abort()
+
+
+def open_exporter(directory: str, mode: str = "run", history: bool = False,
+                  history_retention_days: float = 30) -> Optional[DealsExporter]:
+    """mode: run (replace the previous export) | incremental | off."""
+    if mode == "off":
+        return None
+    if mode not in ("run", "incremental"):
+        raise ValueError(f"unknown export mode {mode!r}")
+    return DealsExporter(directory, incremental=(mode == "incremental"), history=history,
+                         history_retention_days=history_retention_days)
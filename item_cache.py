@@ -0,0 +1,112 @@
+"""
+item_cache.py - persistent TTL cache for PA-API GetItems results
+Features:
+ - Keyed by ASIN: normalized product data or a rejection verdict (reason)
+ - Separate TTLs for accepted products and rejections
+ - Hits skip the PA-API call entirely (saves TPS/TPD quota)
+ - Size-bounded SQLite table under DEALS_DATA_DIR, writes batched until save()
+"""
+
+import json
+import time
+import sqlite3
+import logging
+from typing import Dict, Iterable, List, Tuple
+
+logger = logging.getLogger("amazon_deals_bot")
+
+VERDICT_OK = "ok"
+
+
+class ItemCache:
+    def __init__(self, path: str, ttl_seconds: float = 6 * 3600, reject_ttl_seconds: float = 24 * 3600,
+                 max_entries: int = 50000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.reject_ttl_seconds = reject_ttl_seconds
+        self.max_entries = max_entries
+        self._pending = {}
+        self.hits_ok = 0
+        self.hits_rejected = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " asin TEXT PRIMARY KEY, verdict TEXT NOT NULL, payload TEXT,"
+            " cached_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_items_expires_at ON items(expires_at)")
+        self.conn.commit()
+
+    def lookup(self, asins: Iterable[str]) -> Tuple[List[dict], Dict[str, str], List[str]]:
+        """Split ASINs into (cached products, cached rejections {asin: reason}, misses)."""
+        asins = list(asins)
+        now = time.time()
+        found = {}
+        for asin in asins:
+            if asin in self._pending:
+                found[asin] = self._pending[asin][:2]
+        for i in range(0, len(asins), 500):
+            chunk = [a for a in asins[i:i + 500] if a not in found]
+            if not chunk:
+                continue
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT asin, verdict, payload FROM items WHERE expires_at >= ? AND asin IN ({marks})",
+                [now, *chunk],
+            )
+            for asin, verdict, payload in rows:
+                found[asin] = (verdict, payload)
+
+        products, rejected, misses = [], {}, []
+        for asin in asins:
+            hit = found.get(asin)
+            if hit is None:
+                misses.append(asin)
+            elif hit[0] == VERDICT_OK:
+                products.append(json.loads(hit[1]))
+            else:
+                rejected[asin] = hit[0]
+        self.hits_ok += len(products)
+        self.hits_rejected += len(rejected)
+        self.misses += len(misses)
+        return products, rejected, misses
+
+    def put_product(self, asin: str, product: dict):
+        now = time.time()
+        self._pending[asin] = (VERDICT_OK, json.dumps(product), now, now + self.ttl_seconds)
+
+    def put_rejection(self, asin: str, reason: str):
+        now = time.time()
+        self._pending[asin] = (reason, None, now, now + self.reject_ttl_seconds)
+
+    def save(self):
+        pending, self._pending = self._pending, {}
+        try:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO items (asin, verdict, payload, cached_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+                    [(asin, *row) for asin, row in pending.items()],
+                )
+                self.conn.execute("DELETE FROM items WHERE expires_at < ?", (time.time(),))
+                excess = self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self.conn.execute(
+                        "DELETE FROM items WHERE asin IN (SELECT asin FROM items ORDER BY cached_at LIMIT ?)", (excess,)
+                    )
+        except Exception as e:
+            self._pending.update(pending)
+            logger.exception("Error saving item cache: %s", e)
+
+    def log_stats(self):
+        total = self.hits_ok + self.hits_rejected + self.misses
+        rate = (self.hits_ok + self.hits_rejected) / total * 100 if total else 0.0
+        logger.info("Item cache: hit rate %.0f%% (%d products, %d rejections), %d misses",
+                    rate, self.hits_ok, self.hits_rejected, self.misses)
+
+    def close(self, save: bool = True):
+        if save:
+            self.save()
+        self.conn.close()
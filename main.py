@@ -3,42 +3,73 @@
 main.py - Amazon deals -> Telegram bot
 Features:
  - Loads config from env (and .env for local testing)
- - Concurrent scraping (aiohttp) with semaphore
- - ASIN extraction via regex
- - Batched Amazon API calls (with exponential backoff)
+ - Concurrent scraping (aiohttp) with semaphore, pages parsed in a process pool as they arrive
+ - Conditional requests + content-hash page cache (skips parsing unchanged pages)
+ - ASIN extraction via a compiled anchor scanner (asin_extractor.py)
+ - Category scoring with one precompiled whole-word keyword matcher (category_matcher.py)
+ - Batched Amazon API calls, full 10-ASIN batches under an AIMD rate/concurrency controller
+ - Compact __slots__ product records; display strings formatted only when sent (product.py)
+ - Price history per ASIN with rolling 30-day low/median filters against inflated MRPs (price_history.py)
+ - Persistent TTL cache of PA-API results and rejection verdicts (item_cache.py)
+ - Columnar weighted ranking with top-K selection and per-category quotas (ranking.py)
+ - Async pipeline mode: scrape -> enrich -> publish over bounded queues
+ - Streaming, atomic CSV / JSON / text exports of every enriched deal (exporters.py)
  - Telegram messaging (photo with caption or text)
- - Persistent sent_products.json (rotates >7 days)
+ - Routing file: several marketplaces, each scraped and enriched once, fanned out to channels by rules (routing.py)
+ - Token-bucket publish scheduler with durable retries (failed_sends.json)
+ - Persistent dedup store (SQLite or append-only log, TTL 7 days, migrates sent_products.json)
+ - Stage metrics (latency histograms, counters) exported as Prometheus text + JSON
+ - --daemon mode: pooled session, state kept in memory, per-URL scrape intervals, checkpoint on SIGTERM
+ - Cheap import: heavy dependencies load on first use, logging and data dir are set up by main()
+ - --dry-run: scrape and rank item-cache hits without PA-API or Telegram clients
  - Safe defaults suited for hourly runs via GitHub Actions
 """
 
+from __future__ import annotations
+
 import os
 import sys
-import re
+import argparse
 import time
-import json
+import math
 import random
+import signal
 import logging
-from datetime import datetime, timedelta
-from functools import wraps
+import itertools
+from contextlib import aclosing
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-# Async HTTP
 import asyncio
-import aiohttp
 
-# Sync HTTP
-import requests
-from bs4 import BeautifulSoup
+# aiohttp, requests, amazon_paapi and the process pool are imported where first used,
+# so importing this module (tooling, --dry-run) stays cheap
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
-# Amazon API (make sure the package name matches what you installed)
-from amazon_paapi import AmazonApi
+    import aiohttp
 
-# dotenv for local testing (the workflow uses GitHub secrets)
-from dotenv import load_dotenv
+from asin_extractor import AsinExtractor, extract_asins
+from category_matcher import CategoryMatcher
+from dedup_store import open_sent_store
+from exporters import open_exporter
+from item_cache import ItemCache
+from metrics import registry as metrics
+from page_cache import PageCache, content_hash
+from product import Product
+from price_history import PriceHistory
+from paapi_controller import PAAPI_MAX_BATCH, AimdController, FatalPaapiError
+from ranking import CategoryQuota, ProductTable, Ranker, parse_price_band, parse_weights
+from routing import Channel, ChannelRouter, Marketplace, channel_slug, load_routing, make_marketplace
+from scheduler import UrlSchedule, parse_interval_rules
+from telegram_publisher import SendLimiter, SendResult, TelegramPublisher
 
 # === Load .env for local dev (silent if not present) ===
-load_dotenv()
+# Only when run as a script: the constants below are read at import time, and importers
+# (benchmarks, tooling) provide their own environment. The workflow uses GitHub secrets.
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
 
 # === Config from env ===
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -47,70 +78,237 @@ AMAZON_ACCESS_KEY = os.getenv("AMAZON_ACCESS_KEY")
 AMAZON_SECRET_KEY = os.getenv("AMAZON_SECRET_KEY")
 AMAZON_PARTNER_TAG = os.getenv("AMAZON_PARTNER_TAG", "yourtag-21")
 AMAZON_REGION = os.getenv("AMAZON_REGION", "IN")
+TELEGRAM_API_BASE = os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org")
+ROUTING_FILE = os.getenv("ROUTING_FILE")  # JSON marketplaces + channel rules, see routing.py
 
-DATA_DIR = os.path.expanduser(os.getenv("DEALS_DATA_DIR", "~/.amazon_deals"))
-Path(DATA_DIR).mkdir(parents=True, exist_ok=True)
-SENT_PRODUCTS_FILE = os.path.join(DATA_DIR, "sent_products.json")
+DATA_DIR = os.path.expanduser(os.getenv("DEALS_DATA_DIR", "~/.amazon_deals"))  # created by the bot, not on import
+SENT_PRODUCTS_FILE = os.path.join(DATA_DIR, "sent_products.json")  # legacy format, migrated on first run
+DEDUP_BACKEND = os.getenv("DEDUP_BACKEND", "sqlite")  # sqlite | log
+DEDUP_TTL_DAYS = float(os.getenv("DEDUP_TTL_DAYS", "7"))
+DEDUP_BATCH_SIZE = int(os.getenv("DEDUP_BATCH_SIZE", "20"))  # sends buffered per commit
 
 CONCURRENCY = int(os.getenv("DEALS_CONCURRENCY", "3"))
-BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))  # batch size to query Amazon API per call
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", "2"))  # processes for page parsing; 0 = parse on the event loop
+CATEGORY_KEYWORDS_FILE = os.getenv("CATEGORY_KEYWORDS_FILE")  # JSON: {"categories": [...], "keywords": {...}}
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE", "1") == "1"
+PAGE_CACHE_TTL_HOURS = float(os.getenv("PAGE_CACHE_TTL_HOURS", "24"))
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("PAGE_CACHE_MAX_ENTRIES", "2000"))
+ITEM_CACHE_TTL_HOURS = float(os.getenv("ITEM_CACHE_TTL_HOURS", "6"))
+ITEM_CACHE_REJECT_TTL_HOURS = float(os.getenv("ITEM_CACHE_REJECT_TTL_HOURS", "24"))
+ITEM_CACHE_MAX_ENTRIES = int(os.getenv("ITEM_CACHE_MAX_ENTRIES", "50000"))
+PRICE_HISTORY_WINDOW_DAYS = float(os.getenv("PRICE_HISTORY_WINDOW_DAYS", "30"))
+PRICE_HISTORY_RETENTION_DAYS = float(os.getenv("PRICE_HISTORY_RETENTION_DAYS", "90"))
+PRICE_HISTORY_MIN_POINTS = int(os.getenv("PRICE_HISTORY_MIN_POINTS", "3"))  # filters pass until this much history
+PRICE_FILTER = os.getenv("PRICE_FILTER", "off")  # off | lowest (lowest in window) | below_median
+PRICE_BELOW_MEDIAN_PCT = float(os.getenv("PRICE_BELOW_MEDIAN_PCT", "10"))  # for PRICE_FILTER=below_median
+METRICS_PUSHGATEWAY_URL = os.getenv("METRICS_PUSHGATEWAY_URL")  # e.g. http://localhost:9091
+DEALS_PAGES_PER_URL = int(os.getenv("DEALS_PAGES_PER_URL", "1"))  # adds &page=2..N to search (/s?) URLs
+BATCH_SIZE = min(int(os.getenv("BATCH_SIZE", str(PAAPI_MAX_BATCH))), PAAPI_MAX_BATCH)  # ASINs per GetItems call
+PAAPI_INITIAL_RATE = float(os.getenv("PAAPI_INITIAL_RATE", "1"))  # requests/s, grows while calls succeed
+PAAPI_MAX_RATE = float(os.getenv("PAAPI_MAX_RATE", "10"))
+PAAPI_MAX_CONCURRENCY = int(os.getenv("PAAPI_MAX_CONCURRENCY", "4"))
 LOG_FILE = os.getenv("LOG_FILE", os.path.join(DATA_DIR, "amazon_deals_bot.log"))
 MAX_PRODUCTS_PER_RUN = int(os.getenv("MAX_PRODUCTS_PER_RUN", "200"))
-DELAY_BETWEEN_MESSAGES = int(os.getenv("DELAY_BETWEEN_MESSAGES", "5"))
+DELAY_BETWEEN_MESSAGES = float(os.getenv("DELAY_BETWEEN_MESSAGES", "0"))  # optional floor on per-chat spacing
+TELEGRAM_CHAT_RATE_PER_MIN = float(os.getenv("TELEGRAM_CHAT_RATE_PER_MIN", "20"))
+TELEGRAM_CHAT_BURST = float(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+TELEGRAM_GLOBAL_RATE_PER_SEC = float(os.getenv("TELEGRAM_GLOBAL_RATE_PER_SEC", "25"))
+TELEGRAM_MAX_ATTEMPTS = int(os.getenv("TELEGRAM_MAX_ATTEMPTS", "5"))
+TELEGRAM_RETRY_BASE_DELAY = float(os.getenv("TELEGRAM_RETRY_BASE_DELAY", "30"))
+TELEGRAM_RETRY_DRAIN_SECONDS = float(os.getenv("TELEGRAM_RETRY_DRAIN_SECONDS", "120"))  # wait for retries at end of run
+FAILED_SENDS_FILE = "failed_sends.json"  # in the marketplace's data dir
+EXPORT_DIR = os.getenv("EXPORT_DIR", ".")  # amazon_deals_summary.csv, amazon_deals_detailed.json, ...
+EXPORT_MODE = os.getenv("EXPORT_MODE", "run")  # run (replace) | incremental (append new ASINs) | off
+EXPORT_HISTORY = os.getenv("EXPORT_HISTORY", "0") == "1"  # per-run gzip JSONL under EXPORT_DIR/history
+EXPORT_HISTORY_RETENTION_DAYS = float(os.getenv("EXPORT_HISTORY_RETENTION_DAYS", "30"))  # 0 = keep forever
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "async")  # async | sequential
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))  # batches buffered between stages
+DAEMON_INTERVAL_SECONDS = float(os.getenv("DAEMON_INTERVAL_SECONDS", "3600"))  # default per-URL refresh in --daemon
+DAEMON_URL_INTERVALS = os.getenv("DAEMON_URL_INTERVALS")  # "url-substring=seconds;..." e.g. "goldbox=300"
+DAEMON_POOL_SIZE = int(os.getenv("DAEMON_POOL_SIZE", "20"))  # pooled connections shared by pages and Telegram
+DAEMON_SHUTDOWN_GRACE = float(os.getenv("DAEMON_SHUTDOWN_GRACE", "20"))  # seconds a cycle may finish after SIGTERM
+RANK_WEIGHTS = os.getenv("RANK_WEIGHTS")  # e.g. "category=2,discount=1,saving=5,price_band=10,freshness=20"
+RANK_PRICE_BAND = os.getenv("RANK_PRICE_BAND")  # rupees, e.g. "299-4999"; rewarded by the price_band weight
+RANK_FRESHNESS_HALF_LIFE_HOURS = float(os.getenv("RANK_FRESHNESS_HALF_LIFE_HOURS", "24"))
+RANK_CATEGORY_QUOTA = int(os.getenv("RANK_CATEGORY_QUOTA", "0"))  # max sends per category per run; 0 = unlimited
 
-# === Logging ===
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s %(message)s",
-    handlers=[logging.FileHandler(LOG_FILE), logging.StreamHandler(sys.stdout)]
-)
 logger = logging.getLogger("amazon_deals_bot")
 
-# === Helper: exponential backoff decorator ===
-def backoff(max_tries=5, base_delay=1.0, factor=2.0, jitter=0.5, on_exception=(Exception,)):
-    def decorator(fn):
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            tries = 0
-            while tries < max_tries:
-                try:
-                    return fn(*args, **kwargs)
-                except on_exception as e:
-                    tries += 1
-                    if tries >= max_tries:
-                        logger.error("Backoff: max tries reached for %s: %s", fn.__name__, e)
-                        raise
-                    sleep_for = base_delay * (factor ** (tries - 1)) + random.uniform(0, jitter)
-                    logger.warning("Backoff: %s failed (try %d/%d): %s. Sleeping %.2fs",
-                                   fn.__name__, tries, max_tries, e, sleep_for)
-                    time.sleep(sleep_for)
-        return wrapper
-    return decorator
+# === Metrics help text (# HELP lines in metrics.prom) ===
+METRIC_HELP = {
+    "deals_run_seconds": "Wall time of the last run",
+    "deals_sent_products": "ASINs in the dedup stores, per marketplace",
+    "deals_page_fetch_total": "Deals page fetches by url and result (ok, not_modified, error)",
+    "deals_page_bytes_total": "Bytes of deals page HTML downloaded, per url",
+    "deals_page_fetch_seconds": "Deals page fetch latency, per url",
+    "deals_page_parse_seconds": "Time to extract ASINs from one deals page",
+    "deals_asins_extracted": "ASINs extracted from the last fetch of a url",
+    "deals_stage_seconds": "Time spent per pipeline stage (scrape, enrich, publish)",
+    "deals_paapi_batches_total": "PA-API GetItems batches by result (ok, fatal, error)",
+    "deals_paapi_batch_seconds": "PA-API GetItems batch latency, retries included",
+    "deals_item_evaluate_seconds": "Time to validate one PA-API item and build its Product",
+    "deals_items_accepted_total": "Items accepted as deals",
+    "deals_items_rejected_total": "Items rejected, by reason",
+    "deals_rank_seconds": "Time to rank the candidate deals of a run",
+    "deals_quota_skipped_total": "Sends skipped because a channel's category quota was reached",
+    "deals_telegram_sends_total": "Telegram sends by result (ok, retryable, failed)",
+    "deals_telegram_send_seconds": "Telegram Bot API send latency",
+    "deals_telegram_send_rate_per_min": "Telegram messages sent per minute over the run",
+    "deals_telegram_pending_retries": "Telegram sends still waiting for a retry",
+}
+for name, help_text in METRIC_HELP.items():
+    metrics.describe(name, help_text)
+
+
+# === Logging ===
+def setup_logging():
+    """File + stdout logging; called by main() (and benchmarks), never on import."""
+    Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+        handlers=[logging.FileHandler(LOG_FILE), logging.StreamHandler(sys.stdout)]
+    )
+
+
+def expand_paginated_urls(urls: List[str], pages: int) -> List[str]:
+    expanded = []
+    for url in urls:
+        expanded.append(url)
+        if "/s?" in url:
+            expanded.extend(f"{url}&page={n}" for n in range(2, pages + 1))
+    return expanded
+
+
+async def await_watching(aw, stages):
+    """
+    Await aw while watching the pipeline stage tasks. A stage that dies stops draining
+    its queue, so aw (a put, or the upstream stage) would block forever: cancel aw and
+    re-raise that stage's error instead.
+    """
+    main = asyncio.ensure_future(aw)
+    watched = {main, *stages}
+    try:
+        while True:
+            done, _ = await asyncio.wait(watched, return_when=asyncio.FIRST_COMPLETED)
+            if main in done:
+                return main.result()
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    task.result()  # raises the stage's error (or CancelledError)
+            watched -= done
+    finally:
+        main.cancel()
+
+
+def open_channel_router(channels: List[Channel], primary_chat_id=None, dry_run: bool = False) -> ChannelRouter:
+    """
+    One dedup store per chat: the primary channel keeps DATA_DIR's store, the others get channels/<chat>.
+    dry_run opens them read-only: no sent_products.json import, no expiry.
+    """
+    stores = {}
+    for channel in channels:
+        if channel.chat_id in stores:
+            continue
+        primary = channel.chat_id == primary_chat_id
+        data_dir = DATA_DIR if primary else os.path.join(DATA_DIR, "channels", channel_slug(channel.chat_id))
+        Path(data_dir).mkdir(parents=True, exist_ok=True)
+        stores[channel.chat_id] = open_sent_store(
+            data_dir,
+            backend=DEDUP_BACKEND,
+            ttl_seconds=DEDUP_TTL_DAYS * 86400,
+            batch_size=DEDUP_BATCH_SIZE,
+            legacy_json=SENT_PRODUCTS_FILE if primary else None,
+            read_only=dry_run,
+        )
+    return ChannelRouter(channels, stores)
+
+
+def make_send_limiter(router: ChannelRouter, delay_between_messages: float = 0) -> SendLimiter:
+    """Telegram rate limits of the bot token: per-channel rate_per_min overrides, all capped by the message delay."""
+    chat_rate = TELEGRAM_CHAT_RATE_PER_MIN
+    chat_rates = router.rate_overrides()
+    if delay_between_messages and delay_between_messages > 0:
+        chat_rate = min(chat_rate, 60.0 / delay_between_messages)
+        chat_rates = {chat: min(rate, 60.0 / delay_between_messages) for chat, rate in chat_rates.items()}
+    return SendLimiter(chat_rate, TELEGRAM_CHAT_BURST, TELEGRAM_GLOBAL_RATE_PER_SEC, chat_rates)
+
 
 # === Bot class ===
 class AmazonTelegramDealsBot:
-    def __init__(self, telegram_bot_token: str, telegram_channel_id: str):
-        if not (telegram_bot_token and telegram_channel_id and AMAZON_ACCESS_KEY and AMAZON_SECRET_KEY):
+    def __init__(self, telegram_bot_token: str, telegram_channel_id: str, amazon_client=None,
+                 marketplace: Marketplace = None, router: ChannelRouter = None, dry_run: bool = False,
+                 send_limiter: SendLimiter = None):
+        """
+        amazon_client replaces the PA-API client (offline benchmarks use a fake).
+        marketplace and router come from the routing file; without them the bot serves
+        AMAZON_REGION and the single TELEGRAM_CHANNEL_ID. send_limiter is shared by the
+        bots of one token so its global and per-channel rates hold across marketplaces.
+        dry_run builds neither the PA-API client nor anything Telegram, so needs no credentials,
+        and leaves every store and cache on disk as it found it.
+        """
+        has_amazon = amazon_client is not None or (AMAZON_ACCESS_KEY and AMAZON_SECRET_KEY)
+        if not dry_run and not (telegram_bot_token and (telegram_channel_id or router is not None) and has_amazon):
             logger.error("Missing essential environment variables. Exiting.")
             raise SystemExit("Missing configuration")
 
-        # Amazon PAAPI client (throttling param left as default, tune if needed)
-        self.amazon = AmazonApi(
-            AMAZON_ACCESS_KEY,
-            AMAZON_SECRET_KEY,
-            AMAZON_PARTNER_TAG,
-            AMAZON_REGION,
-            throttling=3
+        # marketplace; any other than AMAZON_REGION keeps its caches and retries under markets/<region>
+        self.marketplace = marketplace or make_marketplace(AMAZON_REGION, AMAZON_PARTNER_TAG)
+        self.data_dir = DATA_DIR
+        self.export_dir = EXPORT_DIR
+        if self.marketplace.region != AMAZON_REGION.upper():
+            self.data_dir = os.path.join(DATA_DIR, "markets", self.marketplace.region)
+            self.export_dir = os.path.join(EXPORT_DIR, self.marketplace.region.lower())
+        Path(self.data_dir).mkdir(parents=True, exist_ok=True)
+
+        # Amazon PAAPI client; pacing is done by the AIMD controller, not the client's fixed sleep
+        self.dry_run = dry_run
+        self.amazon = amazon_client
+        if self.amazon is None and not dry_run:
+            from amazon_paapi import AmazonApi
+            self.amazon = AmazonApi(
+                AMAZON_ACCESS_KEY,
+                AMAZON_SECRET_KEY,
+                self.marketplace.partner_tag,
+                self.marketplace.region,
+                throttling=0
+            )
+        self.paapi = AimdController(
+            self.amazon,
+            initial_rate=PAAPI_INITIAL_RATE,
+            max_rate=PAAPI_MAX_RATE,
+            max_concurrency=PAAPI_MAX_CONCURRENCY,
         )
 
         # Telegram
         self.bot_token = telegram_bot_token
         self.channel_id = telegram_channel_id
-        self.telegram_api_url = f"https://api.telegram.org/bot{telegram_bot_token}"
+        self.telegram_api_url = f"{TELEGRAM_API_BASE}/bot{telegram_bot_token}"
 
-        # local state
-        self.sent_products_file = SENT_PRODUCTS_FILE
-        self.sent_products = self.load_sent_products()
+        # local state: channels and their dedup stores (a shared router is closed by its owner)
+        self._owns_router = router is None
+        self.router = router if router is not None else open_channel_router(
+            [Channel(telegram_channel_id, self.marketplace.region)], telegram_channel_id, dry_run=dry_run)
+        self.failed_sends_file = os.path.join(self.data_dir, FAILED_SENDS_FILE)
+        self.send_limiter = send_limiter
+
+        self.page_cache = PageCache(
+            os.path.join(self.data_dir, "page_cache.sqlite3"),
+            ttl_seconds=PAGE_CACHE_TTL_HOURS * 3600,
+            max_entries=PAGE_CACHE_MAX_ENTRIES,
+        ) if PAGE_CACHE_ENABLED else None
+        self.item_cache = ItemCache(
+            os.path.join(self.data_dir, "item_cache.sqlite3"),
+            ttl_seconds=ITEM_CACHE_TTL_HOURS * 3600,
+            reject_ttl_seconds=ITEM_CACHE_REJECT_TTL_HOURS * 3600,
+            max_entries=ITEM_CACHE_MAX_ENTRIES,
+        )
+        self.price_history = PriceHistory(
+            os.path.join(self.data_dir, "price_history.sqlite3"),
+            window_days=PRICE_HISTORY_WINDOW_DAYS,
+            retention_days=PRICE_HISTORY_RETENTION_DAYS,
+            min_points=PRICE_HISTORY_MIN_POINTS,
+        )
 
         # user agents
         self.user_agents = [
@@ -120,216 +318,465 @@ class AmazonTelegramDealsBot:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0',
         ]
 
-        # high commission categories (priority order)
-        self.high_commission_categories = [
-            'Fashion', 'Clothing', 'Shoes', 'Jewelry', 'Watches', 'Bags',
-            'Home & Kitchen', 'Sports & Fitness', 'Beauty & Personal Care',
-            'Toys & Games', 'Books', 'Health & Household', 'Electronics', 'Computers', 'Mobile Phones'
-        ]
+        # high commission categories (priority order) and their title keywords, compiled once
+        self.category_matcher = (CategoryMatcher.from_file(CATEGORY_KEYWORDS_FILE)
+                                 if CATEGORY_KEYWORDS_FILE else CategoryMatcher())
+        self.high_commission_categories = self.category_matcher.categories
 
-        # initial deals URLs (can extend)
-        self.deals_urls = [
-            "https://www.amazon.in/deals?&linkCode=ll2",
-            "https://www.amazon.in/gp/goldbox?&linkCode=ll2",
-            "https://www.amazon.in/deals?discountRanges=10-,&sortBy=BY_SCORE",
-            # category nodes (examples) - extend these if needed
-            "https://www.amazon.in/s?k=deals&rh=n%3A1571271031",  # Fashion
-            "https://www.amazon.in/s?k=deals&rh=n%3A1380263031",  # Home & Kitchen
-            "https://www.amazon.in/s?k=deals&rh=n%3A1355016031",  # Sports
-            "https://www.amazon.in/s?k=deals&rh=n%3A1374618031",  # Beauty
-            "https://www.amazon.in/s?k=deals&rh=n%3A1350380031",  # Toys
-            "https://www.amazon.in/s?k=deals&rh=n%3A976442031",   # Books
-        ]
+        # ranking of enriched products (weights default to category_score * 2 + discount_percentage)
+        self.ranker = Ranker(
+            parse_weights(RANK_WEIGHTS),
+            price_band=parse_price_band(RANK_PRICE_BAND),
+            freshness_half_life_hours=RANK_FRESHNESS_HALF_LIFE_HOURS,
+            category_quota=RANK_CATEGORY_QUOTA,
+        )
+        # candidates of a sequential or dry run, filled as products are accepted (None = not collecting);
+        # the async pipeline ranks only within its publish queue, by score_product
+        self.rank_table = None
 
-        # ASIN patterns
-        self.asin_patterns = [
-            r'/dp/([A-Z0-9]{10})',
-            r'/gp/product/([A-Z0-9]{10})',
-            r'data-asin=["\']?([A-Z0-9]{10})["\']?',
-            r'asin["\']?\s*[:=]\s*["\']([A-Z0-9]{10})["\']',
-            r'data-csa-c-asin=["\']([A-Z0-9]{10})["\']',
-            r'data-testid=".*?([A-Z0-9]{10})"'
-        ]
+        # initial deals URLs (can extend); a routed marketplace may list its own
+        self.deals_urls = [f"https://{self.marketplace.host}/deals", f"https://{self.marketplace.host}/gp/goldbox"]
+        if self.marketplace.deals_urls:
+            self.deals_urls = list(self.marketplace.deals_urls)
+        elif self.marketplace.region == "IN":
+            self.deals_urls = [
+                "https://www.amazon.in/deals?&linkCode=ll2",
+                "https://www.amazon.in/gp/goldbox?&linkCode=ll2",
+                "https://www.amazon.in/deals?discountRanges=10-,&sortBy=BY_SCORE",
+                # category nodes (examples) - extend these if needed
+                "https://www.amazon.in/s?k=deals&rh=n%3A1571271031",  # Fashion
+                "https://www.amazon.in/s?k=deals&rh=n%3A1380263031",  # Home & Kitchen
+                "https://www.amazon.in/s?k=deals&rh=n%3A1355016031",  # Sports
+                "https://www.amazon.in/s?k=deals&rh=n%3A1374618031",  # Beauty
+                "https://www.amazon.in/s?k=deals&rh=n%3A1350380031",  # Toys
+                "https://www.amazon.in/s?k=deals&rh=n%3A976442031",   # Books
+            ]
+        self.deals_urls = expand_paginated_urls(self.deals_urls, DEALS_PAGES_PER_URL)
+
+        # ASIN extraction (patterns compiled once)
+        self.asin_extractor = AsinExtractor()
 
+        self.exporter = None
+        self.paapi_disabled = False
+        self.run_started = None
         self.consecutive_failures = 0
         self.base_delay = 2
 
     # ---------- persistence ----------
-    def load_sent_products(self):
-        try:
-            if os.path.exists(self.sent_products_file):
-                with open(self.sent_products_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                # keep entries not older than 7 days
-                cutoff = datetime.now() - timedelta(days=7)
-                cleaned = {k: v for k, v in data.items() if datetime.fromisoformat(v) > cutoff}
-                return cleaned
-        except Exception as e:
-            logger.exception("Error loading sent products: %s", e)
-        return {}
-
     def save_sent_products(self):
+        self.router.flush()
+
+    def save_state(self):
+        self.save_sent_products()
+        if self.page_cache:
+            self.page_cache.save()
+            self.page_cache.log_stats()
+        self.item_cache.save()
+        self.item_cache.log_stats()
+        self.price_history.save()
+        self.price_history.log_stats()
+        self.paapi.log_stats()
+        self.export_metrics()
+
+    def export_metrics(self):
+        if self.run_started is not None:
+            metrics.set("deals_run_seconds", time.perf_counter() - self.run_started)
+        metrics.set("deals_sent_products", len(self.router), marketplace=self.marketplace.region)
+        metrics.write(DATA_DIR)
+        if METRICS_PUSHGATEWAY_URL:
+            metrics.push(METRICS_PUSHGATEWAY_URL)
+
+    def close(self):
+        if self._owns_router:
+            self.router.close()
+        else:
+            self.router.flush()
+        # a dry run only reads: page validators and cache bookkeeping it touched are dropped
+        save = not self.dry_run
+        if self.page_cache:
+            self.page_cache.close(save=save)
+        self.item_cache.close(save=save)
+        self.price_history.close(save=save)
+
+    # ---------- export ----------
+    def start_export(self, mode: str = EXPORT_MODE):
+        exporter = open_exporter(self.export_dir, mode, history=EXPORT_HISTORY,
+                                 history_retention_days=EXPORT_HISTORY_RETENTION_DAYS)
+        self.exporter = exporter.open() if exporter else None
+
+    def export_product(self, product: Product):
+        if self.exporter is not None:
+            self.exporter.write(product)
+
+    def finish_export(self, ok: bool = True):
+        if self.exporter is None:
+            return
         try:
-            with open(self.sent_products_file, "w", encoding="utf-8") as f:
-                json.dump(self.sent_products, f, indent=2)
+            if ok:
+                self.exporter.finalize()
+            else:
+                self.exporter.abort()
         except Exception as e:
-            logger.exception("Error saving sent products: %s", e)
+            logger.exception("Error finalising exports: %s", e)
+        self.exporter = None
 
-    def is_product_already_sent(self, asin: str) -> bool:
-        return asin in self.sent_products
+    def is_product_already_sent(self, asin: str, chat_id=None) -> bool:
+        """Sent to chat_id or, without one, to every channel this bot routes to."""
+        if chat_id is not None:
+            return self.router.is_sent(chat_id, asin)
+        return not self.router.filter_unsent([asin])
 
-    def mark_product_as_sent(self, asin: str):
-        self.sent_products[asin] = datetime.now().isoformat()
-        self.save_sent_products()
+    def mark_product_as_sent(self, asin: str, chat_id=None):
+        self.router.mark(self.channel_id if chat_id is None else chat_id, asin)
 
     def get_random_user_agent(self) -> str:
         return random.choice(self.user_agents)
 
     # ---------- scraping (async) ----------
-    async def _fetch_page(self, session: aiohttp.ClientSession, url: str, sem: asyncio.Semaphore, timeout: int = 20):
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str, sem: asyncio.Semaphore, timeout: int = 20,
+                          extra_headers: dict = None):
+        """
+        Returns (html, meta). meta holds status, etag and last_modified; html is None
+        on failure and on 304 Not Modified.
+        """
         headers = {
             "User-Agent": self.get_random_user_agent(),
             "Accept-Language": "en-US,en;q=0.9",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
         }
+        if extra_headers:
+            headers.update(extra_headers)
         async with sem:
+            start = time.perf_counter()
             try:
                 async with session.get(url, headers=headers, timeout=timeout) as resp:
+                    meta = {
+                        "status": resp.status,
+                        "etag": resp.headers.get("ETag"),
+                        "last_modified": resp.headers.get("Last-Modified"),
+                    }
+                    if resp.status == 304:
+                        metrics.inc("deals_page_fetch_total", url=url, result="not_modified")
+                        return None, meta
                     resp.raise_for_status()
-                    return await resp.text()
+                    body = await resp.read()
+                    metrics.inc("deals_page_bytes_total", len(body), url=url)
+                    metrics.inc("deals_page_fetch_total", url=url, result="ok")
+                    return await resp.text(), meta
             except Exception as e:
+                metrics.inc("deals_page_fetch_total", url=url, result="error")
                 logger.warning("Failed to fetch %s : %s", url, e)
+                return None, {"status": None, "etag": None, "last_modified": None}
+            finally:
+                metrics.observe("deals_page_fetch_seconds", time.perf_counter() - start, url=url)
+
+    def extract_asins_from_page(self, html: str) -> set:
+        return self.asin_extractor.extract(html)
+
+    def _parse_executor(self):
+        if PARSE_WORKERS <= 0:
+            return None
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+
+    async def iter_page_asins(self, session: aiohttp.ClientSession, executor: ProcessPoolExecutor = None,
+                              urls: List[str] = None):
+        """
+        Yield (url, asins) as each page is fetched and parsed. CONCURRENCY workers each
+        hold at most one page, so memory is bounded by pages in flight, not pages total.
+        With the page cache, unchanged pages (304 or same body hash) skip parsing.
+        """
+        loop = asyncio.get_running_loop()
+        cache = self.page_cache
+        sem = asyncio.Semaphore(CONCURRENCY)
+        urls = list(self.deals_urls if urls is None else urls)
+        pending_urls = iter(urls)
+        results = asyncio.Queue(maxsize=CONCURRENCY)
+
+        async def scrape(url):
+            """ASINs of one page, or None when it could not be fetched or parsed."""
+            entry = cache.get(url) if cache else None
+            html, meta = await self._fetch_page(session, url, sem,
+                                                extra_headers=cache.conditional_headers(entry) if cache else None)
+            if meta["status"] == 304 and entry is not None:
+                return cache.not_modified(url)
+            if not html:
                 return None
 
+            digest = content_hash(html) if cache else None
+            asins = cache.lookup_body(url, digest) if cache else None
+            if asins is not None:
+                cache.update_validators(url, meta["etag"], meta["last_modified"])
+                return asins
+            try:
+                with metrics.time("deals_page_parse_seconds"):
+                    if executor is not None:
+                        asins = await loop.run_in_executor(executor, extract_asins, html)
+                    else:
+                        asins = self.extract_asins_from_page(html)
+            except Exception as e:
+                logger.warning("Failed to parse %s : %s", url, e)
+                return None
+            del html
+            if cache:
+                cache.put(url, digest, asins, meta["etag"], meta["last_modified"])
+            return asins
+
+        async def worker():
+            # workers share one URL iterator, so each URL is fetched once
+            for url in pending_urls:
+                try:
+                    asins = await scrape(url)
+                except Exception as e:
+                    # e.g. a page cache error: skip this page, keep the worker (and the scrape) going
+                    logger.exception("Failed to scrape %s : %s", url, e)
+                    continue
+                if asins is None:
+                    continue
+                metrics.set("deals_asins_extracted", len(asins), url=url)
+                await results.put((url, asins))
+
+        async def close():
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                # the consumer always gets the sentinel, even if a worker died
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(max(1, min(CONCURRENCY, len(urls))))]
+        closer = asyncio.create_task(close())
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    await closer  # re-raises a worker failure
+                    return
+                yield item
+        finally:
+            for t in [*workers, closer]:
+                t.cancel()
+
     def extract_asins_from_multiple_pages(self, max_products=1000) -> List[str]:
-        logger.info("🔍 Scraping %d sources with concurrency=%d", len(self.deals_urls), CONCURRENCY)
+        logger.info("🔍 Scraping %d sources with concurrency=%d, parse workers=%d",
+                    len(self.deals_urls), CONCURRENCY, PARSE_WORKERS)
 
-        async def _main():
-            sem = asyncio.Semaphore(CONCURRENCY)
+        async def _main(executor):
+            import aiohttp
+            all_asins = set()
             timeout = aiohttp.ClientTimeout(total=25)
             async with aiohttp.ClientSession(timeout=timeout) as session:
-                tasks = [self._fetch_page(session, url, sem) for url in self.deals_urls]
-                pages = await asyncio.gather(*tasks)
-                return pages
-
-        pages = asyncio.run(_main())
-        all_asins = set()
-        for p in pages:
-            if not p:
-                continue
-            for pattern in self.asin_patterns:
-                matches = re.findall(pattern, p)
-                for m in matches:
-                    if len(m) == 10 and m.isalnum():
-                        all_asins.add(m)
+                async with aclosing(self.iter_page_asins(session, executor)) as pages:
+                    async for _, asins in pages:
+                        all_asins.update(asins)
+            return all_asins
+
+        executor = self._parse_executor()
+        try:
+            with metrics.time("deals_stage_seconds", stage="scrape"):
+                all_asins = asyncio.run(_main(executor))
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
 
         logger.info("Found %d unique ASINs across pages", len(all_asins))
-        new_asins = [a for a in all_asins if not self.is_product_already_sent(a)]
+        new_asins = self.router.filter_unsent(all_asins)
         logger.info("%d ASINs are new (not sent before)", len(new_asins))
         return new_asins[:max_products]
 
     # ---------- Amazon API calls ----------
-    @backoff(max_tries=5, base_delay=2.0, factor=2.0, jitter=1.0, on_exception=(Exception,))
     def fetch_items_batch(self, asins: List[str]):
         """
-        Call amazon.get_items on a batch of ASINs. If Amazon API raises throttle errors,
-        the backoff decorator will retry.
+        Call amazon.get_items on a batch of ASINs. The AIMD controller paces the call,
+        retries throttling/transient errors and splits batches poisoned by a bad ASIN.
         """
+        return asyncio.run(self.fetch_items_batch_async(asins))
+
+    async def fetch_items_batch_async(self, asins: List[str]):
+        """Async variant of fetch_items_batch: the blocking client runs in a worker thread."""
+        start = time.perf_counter()
         try:
-            items = self.amazon.get_items(asins)
-            return items or []
+            items = await self.paapi.get_items(asins)
+            metrics.inc("deals_paapi_batches_total", result="ok")
+            return items
+        except FatalPaapiError:
+            metrics.inc("deals_paapi_batches_total", result="fatal")
+            raise
         except Exception as e:
-            # Let backoff handle retry; raise to trigger it
+            metrics.inc("deals_paapi_batches_total", result="error")
             logger.exception("Amazon API batch error: %s", e)
             raise
+        finally:
+            metrics.observe("deals_paapi_batch_seconds", time.perf_counter() - start)
+
+    async def enrich_asins(self, asins: List[str]) -> List[Product]:
+        """Enrich ASINs in full batches, as many at once as the controller allows."""
+        products = []
+
+        async def run(batch):
+            logger.info("Querying Amazon API for batch - size %d", len(batch))
+            try:
+                items = await self.fetch_items_batch_async(batch)
+            except FatalPaapiError:
+                raise
+            except Exception as e:
+                logger.exception("Failed to fetch batch from Amazon: %s", e)
+                return
+            products.extend(self.process_items(batch, items))
+
+        await asyncio.gather(*(run(asins[i:i + BATCH_SIZE]) for i in range(0, len(asins), BATCH_SIZE)))
+        return products
 
     def get_product_details_single(self, item_obj):
         """
-        Convert an Amazon API returned item object to our product dict.
+        Convert an Amazon API returned item object to a Product record.
         Accepts already-retrieved item object (not raw ASIN).
         """
+        product, _ = self.evaluate_item(item_obj)
+        return product
+
+    def evaluate_item(self, item_obj):
+        """
+        Same conversion as get_product_details_single, but returns (product, None) for
+        a deal or (None, reason) when the item is filtered out.
+        """
+        with metrics.time("deals_item_evaluate_seconds"):
+            product, reason = self._evaluate_item(item_obj)
+        if product:
+            metrics.inc("deals_items_accepted_total")
+        else:
+            metrics.inc("deals_items_rejected_total", reason=reason)
+        return product, reason
+
+    def _evaluate_item(self, item_obj):
+        """
+        Validate the raw item first and build a Product only for deals, so rejected
+        items allocate nothing; display strings are formatted later, on demand.
+        """
         try:
             asin = getattr(item_obj, "asin", None) or getattr(item_obj, "ASIN", None)
-            product_details = {
-                "asin": asin,
-                "title": "N/A",
-                "primary_image": "N/A",
-                "current_price": "N/A",
-                "mrp": "N/A",
-                "discount": "N/A",
-                "discount_percentage": 0,
-                "availability": "N/A",
-                "category_score": 0,
-                "affiliate_url": f"https://www.amazon.in/dp/{asin}?tag={AMAZON_PARTNER_TAG}&linkCode=ogi&th=1&psc=1"
-            }
 
             # item_info.title
+            title = None
             if getattr(item_obj, "item_info", None) and getattr(item_obj.item_info, "title", None):
                 title = item_obj.item_info.title.display_value
-                product_details["title"] = title
-                product_details["category_score"] = self.get_category_priority_score(title)
-
-            if getattr(item_obj, "images", None) and getattr(item_obj.images, "primary", None):
-                product_details["primary_image"] = item_obj.images.primary.large.url
+            if not title:
+                return None, "no_title"
 
             # offers/listings
+            listing = None
             if getattr(item_obj, "offers", None) and getattr(item_obj.offers, "listings", None):
                 listing = item_obj.offers.listings[0]
-                if getattr(listing, "price", None):
-                    product_details["current_price"] = f"₹{listing.price.amount}"
-                if getattr(listing, "saving_basis", None):
-                    product_details["mrp"] = f"₹{listing.saving_basis.amount}"
-                    if getattr(listing, "price", None):
-                        try:
-                            discount_amount = listing.saving_basis.amount - listing.price.amount
-                            discount_percentage = (discount_amount / listing.saving_basis.amount) * 100
-                            product_details["discount"] = f"₹{discount_amount:.0f} ({discount_percentage:.0f}% off)"
-                            product_details["discount_percentage"] = discount_percentage
-                        except Exception:
-                            pass
-                if getattr(listing, "availability", None):
-                    product_details["availability"] = listing.availability.message
-
-            # Validate minimal fields
-            if (product_details["title"] != "N/A" and
-                    product_details["current_price"] != "N/A" and
-                    product_details["discount_percentage"] >= 10):
-                return product_details
+            if listing is None or not getattr(listing, "price", None):
+                return None, "no_price"
+            price = float(listing.price.amount)
+            self.price_history.record(asin, price)
+            mrp = float(listing.saving_basis.amount) if getattr(listing, "saving_basis", None) else 0.0
+            if not mrp or (mrp - price) / mrp * 100 < 10:
+                return None, "low_discount"
+            if not self.passes_price_filter(asin, price):
+                return None, "price_history"
+
+            image = None
+            if getattr(item_obj, "images", None) and getattr(item_obj.images, "primary", None):
+                image = item_obj.images.primary.large.url
+            availability = listing.availability.message if getattr(listing, "availability", None) else None
+            category, category_score = self.get_category_match(title)
+            market = self.marketplace
+            return Product(asin, title, price, mrp, primary_image=image, availability=availability,
+                           category=category, category_score=category_score,
+                           partner_tag=market.partner_tag, host=market.host, currency=market.currency), None
         except Exception as e:
             logger.exception("Error parsing item: %s", e)
-        return None
+        return None, "parse_error"
+
+    def lookup_cached_items(self, asins, record_prices: bool = True):
+        """
+        Item-cache lookup: (cached products, cached rejections {asin: reason}, misses).
+        Hits go through PRICE_FILTER like fresh items, and their cached price is recorded at the
+        time it was observed (so a re-read of the same value is dropped as a repeat) unless
+        record_prices is off.
+        """
+        records, rejected, misses = self.item_cache.lookup(asins)
+        market = self.marketplace
+        self.price_history.prefetch([r["asin"] for r in records])
+        products = []
+        for r in records:
+            if "price_amount" not in r:
+                # cached before the numeric record format; fetched again and re-cached
+                misses.append(r["asin"])
+                continue
+            product = Product.from_record(r, market.partner_tag, market.host, market.currency)
+            if record_prices:
+                self.price_history.record(product.asin, product.price_amount, observed_at=product.seen_at)
+            if not self.passes_price_filter(product.asin, product.price_amount):
+                rejected[product.asin] = "price_history"
+                metrics.inc("deals_items_rejected_total", reason="price_history")
+                continue
+            products.append(product)
+        if self.rank_table is not None:
+            self.rank_table.extend(products)
+        return products, rejected, misses
+
+    def passes_price_filter(self, asin: str, price: float) -> bool:
+        """PRICE_FILTER check against the precomputed rolling aggregates (MRP alone is easy to inflate)."""
+        if PRICE_FILTER == "lowest":
+            return self.price_history.is_lowest(asin, price)
+        if PRICE_FILTER == "below_median":
+            pct = self.price_history.below_median_pct(asin, price)
+            return pct is None or pct >= PRICE_BELOW_MEDIAN_PCT
+        return True
+
+    def process_items(self, asins: List[str], items) -> List[Product]:
+        """Evaluate a GetItems response and record every ASIN's verdict in the item cache."""
+        self.price_history.prefetch(asins)
+        products = []
+        returned = set()
+        for item_obj in items:
+            product, reason = self.evaluate_item(item_obj)
+            asin = getattr(item_obj, "asin", None) or getattr(item_obj, "ASIN", None)
+            returned.add(asin)
+            if product:
+                products.append(product)
+                self.item_cache.put_product(asin, product.to_record())
+                logger.info("   Added product %s (score %.1f, discount %.1f%%)",
+                            product.asin, product.category_score, product.discount_percentage)
+            elif asin and reason != "parse_error":
+                self.item_cache.put_rejection(asin, reason)
+        # ASINs the API did not return are unavailable or not found
+        for asin in set(asins) - returned:
+            self.item_cache.put_rejection(asin, "unavailable")
+            metrics.inc("deals_items_rejected_total", reason="unavailable")
+        if self.rank_table is not None:
+            self.rank_table.extend(products)
+        return products
 
     # ---------- category scoring ----------
     def get_category_priority_score(self, product_title: str, browse_node=None) -> int:
-        title_lower = (product_title or "").lower()
-        category_keywords = {
-            'Fashion': ['dress', 'shirt', 'trouser', 'fashion', 'clothing', 'apparel'],
-            'Clothing': ['clothing', 'wear', 'fabric', 'cotton', 'silk', 'denim'],
-            'Shoes': ['shoes', 'sneakers', 'boots', 'sandals', 'footwear', 'heel'],
-            'Jewelry': ['jewelry', 'ring', 'necklace', 'earring', 'bracelet', 'chain'],
-            'Watches': ['watch', 'smartwatch', 'timepiece', 'wrist'],
-            'Bags': ['bag', 'backpack', 'handbag', 'purse', 'wallet', 'luggage'],
-            'Home & Kitchen': ['kitchen', 'home', 'cookware', 'utensil', 'furniture', 'decor'],
-            'Sports & Fitness': ['sports', 'fitness', 'gym', 'exercise', 'yoga', 'cricket'],
-            'Beauty & Personal Care': ['beauty', 'cosmetic', 'skincare', 'makeup', 'perfume'],
-            'Toys & Games': ['toy', 'game', 'kids', 'children', 'puzzle', 'doll'],
-            'Books': ['book', 'novel', 'guide', 'textbook', 'story'],
-            'Health & Household': ['health', 'wellness', 'medicine', 'supplement', 'vitamin']
-        }
-        for i, category in enumerate(self.high_commission_categories):
-            keywords = category_keywords.get(category, [category.lower()])
-            if any(k in title_lower for k in keywords):
-                return 100 - i
-        return 0
+        return self.category_matcher.score(product_title)
+
+    def get_category_match(self, product_title: str):
+        """(category, score) for the highest-priority category whose keywords appear in the title."""
+        return self.category_matcher.match(product_title)
+
+    def score_titles(self, titles: List[str]) -> List[int]:
+        return [score for _, score in self.category_matcher.match_many(titles)]
+
+    def product_priority(self, product: Product) -> float:
+        return self.ranker.score_product(product)
+
+    def rank_products(self, table: ProductTable, limit: int = None) -> List[Product]:
+        """Best-first products of the table under the configured weights and per-category quota."""
+        with metrics.time("deals_rank_seconds"):
+            return self.ranker.top(table, len(table) if limit is None else limit)
 
     # ---------- messaging ----------
-    def format_product_message(self, product: dict) -> str:
-        title = product.get("title", "Unknown product")
+    def format_product_message(self, product: Product) -> str:
+        title = product.title or "Unknown product"
         if len(title) > 120:
             title = title[:117] + "..."
 
         category_emoji = "🏷️"
-        score = product.get("category_score", 0)
+        score = product.category_score
         if score > 90:
             category_emoji = "👕"
         elif score > 85:
@@ -342,105 +789,450 @@ class AmazonTelegramDealsBot:
         message = (
             f"{category_emoji} *MEGA DEAL ALERT!* 🔥\n\n"
             f"📦 *{title}*\n\n"
-            f"💰 *Price:* {product.get('current_price')}\n"
-            f"🏷️ *MRP:* {product.get('mrp')}\n"
-            f"🎯 *You Save:* {product.get('discount')}\n"
-            f"✅ *Status:* {product.get('availability')}\n\n"
-            f"🛒 {product.get('affiliate_url')}\n\n"
+            f"💰 *Price:* {product.current_price}\n"
+            f"🏷️ *MRP:* {product.mrp}\n"
+            f"🎯 *You Save:* {product.discount}\n"
+            f"✅ *Status:* {product.availability or 'N/A'}\n\n"
+            f"🛒 {product.affiliate_url}\n\n"
             f"#AmazonDeals #MegaSavings #ShopNow"
         )
         return message
 
-    def send_telegram_message(self, message: str, image_url: str = None) -> bool:
+    def _telegram_request(self, message: str, image_url: str = None, chat_id: str = None):
+        chat_id = chat_id or self.channel_id
+        if image_url and image_url != "N/A":
+            url = f"{self.telegram_api_url}/sendPhoto"
+            data = {
+                "chat_id": chat_id,
+                "photo": image_url,
+                "caption": message,
+                "parse_mode": "Markdown"
+            }
+        else:
+            url = f"{self.telegram_api_url}/sendMessage"
+            data = {
+                "chat_id": chat_id,
+                "text": message,
+                "parse_mode": "Markdown",
+                "disable_web_page_preview": "false"
+            }
+        return url, data
+
+    async def send_telegram_request_async(self, session: aiohttp.ClientSession, message: str, image_url: str = None,
+                                          chat_id: str = None) -> SendResult:
+        url, data = self._telegram_request(message, image_url, chat_id)
+        start = time.perf_counter()
         try:
-            if image_url and image_url != "N/A":
-                url = f"{self.telegram_api_url}/sendPhoto"
-                data = {
-                    "chat_id": self.channel_id,
-                    "photo": image_url,
-                    "caption": message,
-                    "parse_mode": "Markdown"
-                }
+            async with session.post(url, data=data, timeout=15) as resp:
+                status = resp.status
+                body = await resp.json(content_type=None)
+        except Exception as e:
+            metrics.inc("deals_telegram_sends_total", result="retryable")
+            logger.warning("Telegram send error: %s", e)
+            return SendResult(False, None, True, str(e))
+        finally:
+            metrics.observe("deals_telegram_send_seconds", time.perf_counter() - start)
+
+        if status == 200 and body.get("ok", False):
+            metrics.inc("deals_telegram_sends_total", result="ok")
+            return SendResult(True, None, False, None)
+        logger.warning("Telegram API returned non-ok: %s %s", status, body)
+        retry_after = (body.get("parameters") or {}).get("retry_after")
+        # 429 flood control and server errors are transient; 4xx (bad markdown, bad photo URL) are not
+        retryable = status == 429 or status >= 500
+        metrics.inc("deals_telegram_sends_total", result="retryable" if retryable else "failed")
+        return SendResult(False, retry_after, retryable, f"{status} {body.get('description', '')}".strip())
+
+    # ---------- publishing ----------
+    def _make_publisher(self, session: aiohttp.ClientSession, delay_between_messages: float = 0) -> TelegramPublisher:
+        async def send(chat_id, message, image_url):
+            return await self.send_telegram_request_async(session, message, image_url, chat_id)
+
+        publisher = TelegramPublisher(
+            send,
+            self.failed_sends_file,
+            limiter=self.send_limiter or make_send_limiter(self.router, delay_between_messages),
+            max_attempts=TELEGRAM_MAX_ATTEMPTS,
+            retry_base_delay=TELEGRAM_RETRY_BASE_DELAY,
+            on_sent=lambda job: self.mark_product_as_sent(job.get("asin", job["key"]), job["chat_id"]),
+        )
+        # a retry may have been superseded by a later successful send
+        for key, job in list(publisher.failed.items()):
+            if self.is_product_already_sent(job.get("asin", key), job["chat_id"]):
+                del publisher.failed[key]
+        return publisher
+
+    def make_send_job(self, product: Product, chat_id=None) -> dict:
+        chat_id = self.channel_id if chat_id is None else chat_id
+        return {
+            # retries are keyed per channel; the primary channel keeps plain ASIN keys
+            "key": product.asin if chat_id == self.channel_id else f"{product.asin}@{chat_id}",
+            "asin": product.asin,
+            "chat_id": chat_id,
+            "message": self.format_product_message(product),
+            "image_url": product.primary_image,
+            "attempts": 0,
+        }
+
+    async def _publish_product(self, publisher: TelegramPublisher, product: Product,
+                               quota: CategoryQuota = None) -> int:
+        """Send to every channel whose rules match and that has not had the product; returns sends."""
+        await publisher.publish_due_retries()
+        sent = 0
+        for channel in self.router.route(product):
+            if quota is not None and not quota.allow((channel.chat_id, product.category)):
+                logger.info("Skipping %s for %s: category quota reached (%s)",
+                            product.asin, channel.chat_id, product.category)
+                metrics.inc("deals_quota_skipped_total")
+                continue
+            if await publisher.publish(self.make_send_job(product, channel.chat_id)):
+                logger.info("Sent successfully: %s -> %s", product.asin, channel.chat_id)
+                sent += 1
             else:
-                url = f"{self.telegram_api_url}/sendMessage"
-                data = {
-                    "chat_id": self.channel_id,
-                    "text": message,
-                    "parse_mode": "Markdown",
-                    "disable_web_page_preview": False
-                }
-            resp = requests.post(url, data=data, timeout=15)
-            if resp.status_code == 200 and resp.json().get("ok", False):
-                return True
-            logger.warning("Telegram API returned non-ok: %s %s", resp.status_code, resp.text)
-            return False
+                logger.warning("Failed to send: %s -> %s", product.asin, channel.chat_id)
+        return sent
+
+    async def _finish_publishing(self, publisher: TelegramPublisher,
+                                 drain_seconds: float = TELEGRAM_RETRY_DRAIN_SECONDS) -> int:
+        await publisher.drain_retries(drain_seconds)
+        publisher.save()
+        publisher.log_stats()
+        stats = publisher.stats()
+        metrics.set("deals_telegram_send_rate_per_min", stats["send_rate_per_min"])
+        metrics.set("deals_telegram_pending_retries", stats["pending_retries"])
+        return publisher.sent
+
+    async def publish_products(self, products: List[Product], delay_between_messages=DELAY_BETWEEN_MESSAGES) -> int:
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=25)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            publisher = self._make_publisher(session, delay_between_messages)
+            idx = 0
+            publisher.queue_depth_fn = lambda: len(products) - idx  # products not yet handed to the publisher
+            for idx, product in enumerate(products, 1):
+                logger.info("Sending %d/%d : %s", idx, len(products), product.asin)
+                await self._publish_product(publisher, product)
+            return await self._finish_publishing(publisher)
+
+    # ---------- async pipeline ----------
+    async def _scrape_stage(self, session: aiohttp.ClientSession, enrich_q: asyncio.Queue,
+                            publish_q: asyncio.PriorityQueue, counter, max_products: int,
+                            executor: ProcessPoolExecutor = None, urls: List[str] = None) -> int:
+        """
+        Fetch pages concurrently and push new ASINs in BATCH_SIZE chunks as each page lands.
+        Item-cache hits go straight to the publish queue; cached rejections are skipped.
+        """
+        urls = self.deals_urls if urls is None else urls
+        logger.info("🔍 Scraping %d sources with concurrency=%d, parse workers=%d",
+                    len(urls), CONCURRENCY, PARSE_WORKERS)
+        start = time.perf_counter()
+        seen = set()
+        batch = []
+        queued = 0
+        async with aclosing(self.iter_page_asins(session, executor, urls)) as pages:
+            async for _, asins in pages:
+                fresh = asins - seen
+                seen.update(fresh)
+                cached, _, misses = self.lookup_cached_items(self.router.filter_unsent(fresh))
+                for product in cached:
+                    if queued >= max_products:
+                        break
+                    await self._queue_for_publish(publish_q, counter, product)
+                    queued += 1
+                for asin in misses:
+                    if queued >= max_products:
+                        break
+                    batch.append(asin)
+                    queued += 1
+                    if len(batch) >= BATCH_SIZE:
+                        await enrich_q.put(batch)
+                        batch = []
+                if queued >= max_products:
+                    break
+        if batch:
+            await enrich_q.put(batch)
+        metrics.observe("deals_stage_seconds", time.perf_counter() - start, stage="scrape")
+        logger.info("Found %d unique ASINs across pages, queued %d new", len(seen), queued)
+        return queued
+
+    async def _queue_for_publish(self, publish_q: asyncio.PriorityQueue, counter, product: Product):
+        self.export_product(product)
+        # best-ranked product waiting in the queue is published first
+        await publish_q.put((-self.product_priority(product), next(counter), product))
+
+    async def _enrich_stage(self, enrich_q: asyncio.Queue, publish_q: asyncio.PriorityQueue, counter):
+        while True:
+            batch = await enrich_q.get()
+            if batch is None:
+                return
+            if self.paapi_disabled:
+                # keep draining so the scrape stage never blocks on a full queue
+                continue
+            logger.info("Querying Amazon API for batch - size %d", len(batch))
+            try:
+                items = await self.fetch_items_batch_async(batch)
+            except FatalPaapiError as e:
+                logger.error("PA-API configuration error, skipping enrichment for this run: %s", e)
+                self.paapi_disabled = True
+                continue
+            except Exception as e:
+                logger.exception("Failed to fetch batch from Amazon: %s", e)
+                continue
+
+            try:
+                for product in self.process_items(batch, items):
+                    await self._queue_for_publish(publish_q, counter, product)
+            except Exception as e:
+                # e.g. the export disk is full: drop this batch, keep the stage draining its queue
+                logger.exception("Failed to process batch of %d ASINs: %s", len(batch), e)
+
+    async def _publish_stage(self, session: aiohttp.ClientSession, publish_q: asyncio.PriorityQueue,
+                             delay_between_messages: float, publisher: TelegramPublisher = None,
+                             drain_seconds: float = TELEGRAM_RETRY_DRAIN_SECONDS) -> int:
+        """Publish until the sentinel; returns the number sent by this run (the publisher may be long-lived)."""
+        publisher = publisher or self._make_publisher(session, delay_between_messages)
+        publisher.queue_depth_fn = publish_q.qsize
+        sent_before = publisher.sent
+        quota = CategoryQuota(RANK_CATEGORY_QUOTA)
+        idx = 0
+        while True:
+            _, _, product = await publish_q.get()
+            if product is None:
+                return await self._finish_publishing(publisher, drain_seconds) - sent_before
+            idx += 1
+            logger.info("Sending %d : %s", idx, product.asin)
+            try:
+                await self._publish_product(publisher, product, quota)
+            except Exception as e:
+                logger.exception("Failed to publish %s : %s", product.asin, e)
+
+    async def run_pipeline(self, max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES,
+                           session: aiohttp.ClientSession = None, executor: ProcessPoolExecutor = None,
+                           urls: List[str] = None, publisher: TelegramPublisher = None,
+                           drain_seconds: float = TELEGRAM_RETRY_DRAIN_SECONDS) -> int:
+        """
+        Run scrape, enrich and publish concurrently. Each stage hands work to the next
+        through a bounded queue, so total time tracks the slowest stage.
+        A one-shot run creates its own session and parse pool; the daemon passes in its
+        long-lived session, pool and publisher.
+        """
+        if session is None:
+            import aiohttp
+            timeout = aiohttp.ClientTimeout(total=25)
+            executor = self._parse_executor()
+            try:
+                async with aiohttp.ClientSession(timeout=timeout) as session:
+                    return await self.run_pipeline(max_products, delay_between_messages, session, executor,
+                                                   urls, publisher, drain_seconds)
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+
+        enrich_q = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        publish_q = asyncio.PriorityQueue(maxsize=PIPELINE_QUEUE_SIZE * BATCH_SIZE)
+        counter = itertools.count()
+        publish_task = asyncio.create_task(
+            self._publish_stage(session, publish_q, delay_between_messages, publisher, drain_seconds))
+        enrichers = [asyncio.create_task(self._enrich_stage(enrich_q, publish_q, counter))
+                     for _ in range(max(1, PAAPI_MAX_CONCURRENCY))]
+        stages = [publish_task, *enrichers]
+        start = time.perf_counter()
+        try:
+            await await_watching(
+                self._scrape_stage(session, enrich_q, publish_q, counter, max_products, executor, urls), stages)
+            for _ in enrichers:
+                await await_watching(enrich_q.put(None), stages)
+            await await_watching(asyncio.gather(*enrichers), [publish_task])
+            # stages overlap, so these are wall-clock times until each stage drained
+            metrics.observe("deals_stage_seconds", time.perf_counter() - start, stage="enrich")
+            # sentinel sorts after every product, so the queue drains first
+            await await_watching(publish_q.put((math.inf, next(counter), None)), [publish_task])
+            sent = await publish_task
+            metrics.observe("deals_stage_seconds", time.perf_counter() - start, stage="publish")
+            return sent
+        finally:
+            for t in [publish_task, *enrichers]:
+                t.cancel()
+
+    # ---------- daemon ----------
+    async def _daemon_cycle(self, session: aiohttp.ClientSession, executor: ProcessPoolExecutor,
+                            publisher: TelegramPublisher, urls: List[str], max_products: int,
+                            delay_between_messages: float, stop: asyncio.Event) -> int:
+        """One scrape -> publish cycle over the due URLs, then checkpoint. Returns products sent."""
+        self.run_started = time.perf_counter()
+        self.paapi_disabled = False
+        sent_before = publisher.sent
+        # cycles only cover the due URLs, so each one adds to the export instead of replacing it
+        self.start_export("off" if EXPORT_MODE == "off" else "incremental")
+        cycle = asyncio.create_task(self.run_pipeline(max_products, delay_between_messages, session, executor,
+                                                      urls, publisher, drain_seconds=0))
+        stopper = asyncio.create_task(stop.wait())
+        try:
+            await asyncio.wait({cycle, stopper}, return_when=asyncio.FIRST_COMPLETED)
+            if not cycle.done():
+                logger.info("Shutdown requested: giving the current cycle %.1fs to finish", DAEMON_SHUTDOWN_GRACE)
+                await asyncio.wait({cycle}, timeout=DAEMON_SHUTDOWN_GRACE)
+            if not cycle.done():
+                cycle.cancel()
+                await asyncio.gather(cycle, return_exceptions=True)
+                self.finish_export(ok=False)
+            else:
+                cycle.result()
+                self.finish_export()
         except Exception as e:
-            logger.exception("Telegram send error: %s", e)
-            return False
+            logger.exception("Daemon cycle failed: %s", e)
+            self.finish_export(ok=False)
+        finally:
+            stopper.cancel()
+            publisher.save()
+            self.save_state()
+        return publisher.sent - sent_before
+
+    async def run_daemon(self, max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES,
+                         stop: asyncio.Event = None):
+        """
+        Long-running mode: one pooled aiohttp session for Amazon pages and Telegram, dedup
+        state, caches and the PA-API controller kept in memory, and each deals URL scraped on
+        its own interval. SIGTERM/SIGINT finish (or, after a grace period, cancel) the current
+        cycle and checkpoint state before exiting. Daemons of several marketplaces share the
+        caller's stop event instead of installing their own signal handlers.
+        """
+        schedule = UrlSchedule(self.deals_urls, DAEMON_INTERVAL_SECONDS, parse_interval_rules(DAEMON_URL_INTERVALS))
+        logger.info("Daemon started for %s: %d URLs, %d channels",
+                    self.marketplace.region, len(self.deals_urls), len(self.router.channels))
+        schedule.log_intervals()
+
+        loop = asyncio.get_running_loop()
+        handle_signals = stop is None
+        if handle_signals:
+            stop = asyncio.Event()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stop.set)
+
+        import aiohttp
+        executor = self._parse_executor()
+        connector = aiohttp.TCPConnector(limit=DAEMON_POOL_SIZE, ttl_dns_cache=300, keepalive_timeout=60)
+        cycles = 0
+        try:
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=25), connector=connector) as session:
+                publisher = self._make_publisher(session, delay_between_messages)
+                while not stop.is_set():
+                    urls = schedule.due(time.monotonic())
+                    if urls:
+                        cycles += 1
+                        logger.info("Daemon cycle %d: %d due URLs", cycles, len(urls))
+                        sent = await self._daemon_cycle(session, executor, publisher, urls, max_products,
+                                                        delay_between_messages, stop)
+                        schedule.mark_run(urls, time.monotonic())
+                        logger.info("Daemon cycle %d finished: sent %d, database size %d",
+                                    cycles, sent, len(self.router))
+                    else:
+                        await publisher.publish_due_retries()
+
+                    wait = schedule.seconds_until_next(time.monotonic())
+                    retry_at = publisher.next_retry_at()
+                    if retry_at is not None:
+                        wait = min(wait, max(0.0, retry_at - time.time()))
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+                publisher.save()
+        finally:
+            if handle_signals:
+                for sig in (signal.SIGTERM, signal.SIGINT):
+                    loop.remove_signal_handler(sig)
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            self.save_state()
+            logger.info("Daemon stopped after %d cycles", cycles)
 
     # ---------- main pipeline ----------
-    def process_all_deals_to_telegram(self, max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES):
+    def process_all_deals_to_telegram(self, max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES,
+                                      pipeline_mode=PIPELINE_MODE):
+        self.start_export()
+        try:
+            self._process_all_deals(max_products, delay_between_messages, pipeline_mode)
+        except BaseException:
+            # keep the previous export rather than publishing a partial one
+            self.finish_export(ok=False)
+            raise
+        self.finish_export()
+
+    def _process_all_deals(self, max_products, delay_between_messages, pipeline_mode):
         logger.info("=" * 40)
-        logger.info("START RUN - Processing deals")
+        logger.info("START RUN - Processing deals (%s pipeline, marketplace %s, %d channels)",
+                    pipeline_mode, self.marketplace.region, len(self.router.channels))
         logger.info("=" * 40)
+        self.run_started = time.perf_counter()
+
+        if pipeline_mode == "async":
+            successful_sends = asyncio.run(self.run_pipeline(max_products, delay_between_messages))
+            self.save_state()
+            logger.info("Run finished. Sent %d products", successful_sends)
+            logger.info("Database size: %d", len(self.router))
+            logger.info("=" * 40)
+            return
 
         # Step 1: extract ASINs
         asins = self.extract_asins_from_multiple_pages(max_products=max_products)
         if not asins:
-            logger.info("No new ASINs found. Exiting run.")
-            return
-
-        logger.info("Processing %d ASINs...", len(asins))
+            logger.info("No new ASINs found.")
+        else:
+            logger.info("Processing %d ASINs...", len(asins))
 
-        # Step 2: batch Amazon API calls
-        products_with_scores = []
-        for i in range(0, len(asins), BATCH_SIZE):
-            batch = asins[i:i + BATCH_SIZE]
-            logger.info("Querying Amazon API for batch %d - size %d", i // BATCH_SIZE + 1, len(batch))
+        # Step 2: batch Amazon API calls (item-cache hits skip the API); accepted products
+        # are added to the ranking table as they arrive
+        enrich_start = time.perf_counter()
+        self.rank_table = table = ProductTable()
+        try:
+            products_with_scores, _, misses = self.lookup_cached_items(asins)
             try:
-                items = self.fetch_items_batch(batch)
-            except Exception as e:
-                logger.exception("Failed to fetch batch from Amazon: %s", e)
-                continue
-
-            # items may be list of item objects
-            for item_obj in items:
-                product = self.get_product_details_single(item_obj)
-                if product:
-                    products_with_scores.append(product)
-                    logger.info("   Added product %s (score %.1f, discount %.1f%%)",
-                                product.get("asin"), product.get("category_score", 0), product.get("discount_percentage", 0))
+                products_with_scores.extend(asyncio.run(self.enrich_asins(misses)))
+            except FatalPaapiError as e:
+                logger.error("PA-API configuration error, skipping enrichment for this run: %s", e)
+        finally:
+            self.rank_table = None
+        metrics.observe("deals_stage_seconds", time.perf_counter() - enrich_start, stage="enrich")
+        for product in products_with_scores:
+            self.export_product(product)
 
-            # sleep between batches to be gentle on the API
-            time.sleep(random.uniform(1.5, 3.5))
+        if asins and not products_with_scores:
+            logger.info("No product passed filtering (discount/fields).")
 
-        if not products_with_scores:
-            logger.info("No product passed filtering (discount/fields). Exiting run.")
-            return
+        # Step 3: rank (weighted score, top-K within per-category quotas)
+        products_with_scores = self.rank_products(table)
 
-        # Step 3: sort by priority: category_score * 2 + discount_percentage
-        products_with_scores.sort(key=lambda x: (x.get("category_score", 0) * 2 + x.get("discount_percentage", 0)), reverse=True)
-
-        # Step 4: send to Telegram (with small delay)
-        successful_sends = 0
-        for idx, product in enumerate(products_with_scores, 1):
-            logger.info("Sending %d/%d : %s", idx, len(products_with_scores), product["asin"])
-            msg = self.format_product_message(product)
-            if self.send_telegram_message(msg, product.get("primary_image")):
-                successful_sends += 1
-                self.mark_product_as_sent(product["asin"])
-                logger.info("Sent successfully: %s", product["asin"])
-            else:
-                logger.warning("Failed to send: %s", product["asin"])
-            time.sleep(delay_between_messages + random.uniform(0, 2))
+        # Step 4: send to Telegram through the rate scheduler (also retries earlier failures)
+        with metrics.time("deals_stage_seconds", stage="publish"):
+            successful_sends = asyncio.run(self.publish_products(products_with_scores, delay_between_messages))
 
+        self.save_state()
         logger.info("Run finished. Sent %d products", successful_sends)
-        logger.info("Database size: %d", len(self.sent_products))
+        logger.info("Database size: %d", len(self.router))
         logger.info("=" * 40)
 
+    # ---------- dry run ----------
+    def dry_run_products(self, max_products=MAX_PRODUCTS_PER_RUN) -> List[Product]:
+        """
+        Scrape and rank without PA-API or Telegram: new ASINs are ranked from the item
+        cache only, and nothing is sent, marked as sent or exported.
+        """
+        self.run_started = time.perf_counter()
+        asins = self.extract_asins_from_multiple_pages(max_products=max_products)
+        self.rank_table = table = ProductTable()
+        try:
+            products, rejected, misses = self.lookup_cached_items(asins, record_prices=False)
+        finally:
+            self.rank_table = None
+        logger.info("Dry run (%s): %d new ASINs - %d cached deals, %d cached rejections, %d not enriched",
+                    self.marketplace.region, len(asins), len(products), len(rejected), len(misses))
+        return self.rank_products(table)
+
     # ---------- utility ----------
     def test_telegram_connection(self) -> bool:
         try:
+            import requests
             url = f"{self.telegram_api_url}/getMe"
             r = requests.get(url, timeout=10)
             if r.status_code == 200 and r.json().get("ok", False):
@@ -454,13 +1246,99 @@ class AmazonTelegramDealsBot:
             return False
 
 
+# ---------- marketplaces ----------
+def build_bots(dry_run: bool = False):
+    """
+    One bot per marketplace. Without ROUTING_FILE that is the single AMAZON_REGION bot
+    posting to TELEGRAM_CHANNEL_ID; with it, every bot shares one router (and so one
+    dedup store per channel), returned alongside for the caller to close, and one set of
+    Telegram rate limits.
+    """
+    if not ROUTING_FILE:
+        return [AmazonTelegramDealsBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID, dry_run=dry_run)], None
+    marketplaces, channels = load_routing(ROUTING_FILE, AMAZON_REGION, AMAZON_PARTNER_TAG)
+    router = open_channel_router(channels, TELEGRAM_CHANNEL_ID, dry_run=dry_run)
+    limiter = make_send_limiter(router, DELAY_BETWEEN_MESSAGES)
+    bots = []
+    try:
+        for marketplace in marketplaces.values():
+            routed = router.subset(marketplace.region)
+            if not routed.channels:
+                logger.warning("Marketplace %s has no channels; skipping it", marketplace.region)
+                continue
+            logger.info("Marketplace %s -> %s", marketplace.region, ", ".join(str(c.chat_id) for c in routed.channels))
+            bots.append(AmazonTelegramDealsBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID,
+                                               marketplace=marketplace, router=routed, dry_run=dry_run,
+                                               send_limiter=limiter))
+    except BaseException:
+        for bot in bots:
+            bot.close()
+        router.close()
+        raise
+    return bots, router
+
+
+async def run_daemons(bots, max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES):
+    """Run one daemon per marketplace concurrently; SIGTERM/SIGINT stop them all."""
+    if len(bots) == 1:
+        return await bots[0].run_daemon(max_products, delay_between_messages)
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await asyncio.gather(*(bot.run_daemon(max_products, delay_between_messages, stop) for bot in bots))
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+
+
 # ---------- CLI execution ----------
-def main():
-    bot = AmazonTelegramDealsBot(TELEGRAM_BOT_TOKEN, TELEGRAM_CHANNEL_ID)
-    if not bot.test_telegram_connection():
-        logger.error("Telegram connection test failed - check TELEGRAM_BOT_TOKEN and TELEGRAM_CHANNEL_ID")
-        return
-    bot.process_all_deals_to_telegram(max_products=MAX_PRODUCTS_PER_RUN, delay_between_messages=DELAY_BETWEEN_MESSAGES)
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Amazon deals -> Telegram bot")
+    parser.add_argument("--daemon", action="store_true",
+                        help="keep running: scrape each URL on its own interval until SIGTERM")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="scrape and rank (item-cache hits only) without PA-API or Telegram; nothing is sent")
+    args = parser.parse_args(argv)
+    if args.daemon and args.dry_run:
+        parser.error("--dry-run cannot be combined with --daemon")
+    return args
+
+
+def print_dry_run(bot: AmazonTelegramDealsBot, products: List[Product]):
+    for product in products:
+        chats = ", ".join(str(c.chat_id) for c in bot.router.route(product) if c.chat_id is not None) or "-"
+        print(f"{bot.product_priority(product):8.1f}  {product.asin}  {product.discount_percentage:5.1f}%  "
+              f"{product.current_price:>12}  {product.category or '-':<18}  -> {chats}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging()
+    bots, router = build_bots(dry_run=args.dry_run)
+    try:
+        if args.dry_run:
+            for bot in bots:
+                print_dry_run(bot, bot.dry_run_products(max_products=MAX_PRODUCTS_PER_RUN))
+            return
+        if not bots[0].test_telegram_connection():
+            logger.error("Telegram connection test failed - check TELEGRAM_BOT_TOKEN and TELEGRAM_CHANNEL_ID")
+            return
+        if args.daemon:
+            asyncio.run(run_daemons(bots, max_products=MAX_PRODUCTS_PER_RUN,
+                                    delay_between_messages=DELAY_BETWEEN_MESSAGES))
+        else:
+            # marketplaces run one after another; each scrapes and enriches its ASINs once
+            for bot in bots:
+                bot.process_all_deals_to_telegram(max_products=MAX_PRODUCTS_PER_RUN,
+                                                  delay_between_messages=DELAY_BETWEEN_MESSAGES)
+    finally:
+        # commit any buffered sends and cache entries even if the run is interrupted
+        for bot in bots:
+            bot.close()
+        if router is not None:
+            router.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,137 @@
+"""
+metrics.py - in-process metrics for the deals pipeline
+Features:
+ - Counters, gauges and latency histograms with labels
+ - Prometheus text exposition format and JSON export
+ - Optional push to a pushgateway-compatible endpoint
+"""
+
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger("amazon_deals_bot")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.types = {}  # name -> counter | gauge | histogram
+        self.help = {}
+        self.values = {}  # name -> {label_key: float | histogram dict}
+
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+
+    def _series(self, name: str, kind: str) -> dict:
+        known = self.types.setdefault(name, kind)
+        if known != kind:
+            raise ValueError(f"metric {name} already registered as {known}")
+        return self.values.setdefault(name, {})
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self._series(name, "counter")
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self._series(name, "gauge")[_label_key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        series = self._series(name, "histogram")
+        key = _label_key(labels)
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                hist["buckets"][i] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+
+    @contextmanager
+    def time(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    # ---------- export ----------
+    def to_prometheus(self) -> str:
+        lines = []
+        for name in sorted(self.types):
+            kind = self.types[name]
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(self.values[name].items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+                    continue
+                # bucket counts are already cumulative (observe() fills every bucket >= value)
+                for bound, count in zip(self.buckets, value["buckets"]):
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', repr(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, (('le', '+Inf'),))} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(key)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> dict:
+        out = {}
+        for name, kind in self.types.items():
+            out[name] = {
+                "type": kind,
+                "series": [{"labels": dict(key), "value": value} for key, value in self.values[name].items()],
+            }
+            if kind == "histogram":
+                out[name]["buckets"] = list(self.buckets)
+        return out
+
+    def write(self, directory: str, basename: str = "metrics"):
+        try:
+            for ext, payload in (("prom", self.to_prometheus()),
+                                 ("json", json.dumps(self.to_json(), indent=2))):
+                path = os.path.join(directory, f"{basename}.{ext}")
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(path + ".tmp", path)
+            logger.info("Metrics written to %s", os.path.join(directory, basename + ".{prom,json}"))
+        except Exception as e:
+            logger.exception("Error writing metrics: %s", e)
+
+    def push(self, url: str, job: str = "amazon_deals_bot", timeout: int = 10) -> bool:
+        import requests
+
+        try:
+            resp = requests.put(f"{url.rstrip('/')}/metrics/job/{job}", data=self.to_prometheus().encode("utf-8"),
+                                headers={"Content-Type": "text/plain; version=0.0.4"}, timeout=timeout)
+            if resp.status_code // 100 == 2:
+                return True
+            logger.warning("Pushgateway returned %s %s", resp.status_code, resp.text)
+        except Exception as e:
+            logger.warning("Pushgateway push failed: %s", e)
+        return False
+
+
+# process-wide registry shared by the bot and its helpers
+registry = MetricsRegistry()
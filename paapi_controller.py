@@ -0,0 +1,222 @@
+"""
+paapi_controller.py - adaptive PA-API GetItems batching and pacing
+Features:
+ - AIMD control of request rate and concurrency: additive increase while calls
+   succeed, multiplicative decrease only on real throttling (HTTP 429)
+ - Errors classified as throttled / transient / poison / fatal (incl. 401/403) / not found
+ - A batch poisoned by one bad ASIN is split in halves instead of dropped
+ - Works from any event loop (sequential runs use asyncio.run per stage)
+"""
+
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import List
+
+from metrics import registry as metrics
+
+logger = logging.getLogger("amazon_deals_bot")
+
+metrics.describe("deals_paapi_throttled_total", "PA-API calls rejected with HTTP 429")
+metrics.describe("deals_paapi_retries_total", "PA-API calls retried, by error kind")
+metrics.describe("deals_paapi_batch_splits_total", "PA-API batches split in halves to isolate a bad ASIN")
+metrics.describe("deals_paapi_poisoned_asins_total", "ASINs skipped because PA-API rejected them")
+metrics.describe("deals_paapi_rate", "PA-API request rate (req/s) at the end of the run")
+metrics.describe("deals_paapi_concurrency", "PA-API concurrent calls allowed at the end of the run")
+
+PAAPI_MAX_BATCH = 10  # GetItems accepts at most 10 ItemIds per call
+
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+POISON = "poison"
+FATAL = "fatal"
+NOT_FOUND = "not_found"
+
+# 401/403 reach us as a plain RequestError("Request failed: <reason>")
+AUTH_FAILURE_MARKERS = ("Unauthorized", "Forbidden", "InvalidSignature", "UnrecognizedClient", "AccessDenied")
+
+
+class FatalPaapiError(Exception):
+    """Credentials / partner tag problems: retrying or splitting cannot help."""
+
+
+def _is_auth_failure(exc: Exception) -> bool:
+    """The SDK raises RequestError inside its ApiException handler; that exception (status, body) is the context."""
+    api_error = exc.__cause__ or exc.__context__
+    if getattr(api_error, "status", None) in (401, 403):
+        return True
+    body = getattr(api_error, "body", None) or ""
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    text = f"{exc} {body}"
+    return any(marker in text for marker in AUTH_FAILURE_MARKERS)
+
+
+def classify_error(exc: Exception) -> str:
+    # imported on the first error, so loading this module does not pull in the PA-API SDK
+    from amazon_paapi.errors import (
+        AsinNotFound,
+        AssociateValidationError,
+        InvalidArgument,
+        InvalidPartnerTag,
+        ItemsNotFound,
+        MalformedRequest,
+        RequestError,
+        TooManyRequests,
+    )
+
+    if isinstance(exc, ItemsNotFound):
+        return NOT_FOUND
+    if isinstance(exc, TooManyRequests):
+        return THROTTLED
+    if isinstance(exc, (AssociateValidationError, InvalidPartnerTag)):
+        return FATAL
+    # bad keys or signature: every retry fails the same way
+    if isinstance(exc, RequestError) and _is_auth_failure(exc):
+        return FATAL
+    if isinstance(exc, InvalidArgument) and "partner tag" in str(exc).lower():
+        return FATAL
+    # InvalidParameterValue (a bad ItemId), unparseable ASIN, bad request shape
+    if isinstance(exc, (InvalidArgument, AsinNotFound, MalformedRequest)):
+        return POISON
+    # RequestError, connection resets, timeouts
+    return TRANSIENT
+
+
+class AimdController:
+    def __init__(self, amazon, initial_rate: float = 1.0, min_rate: float = 0.2, max_rate: float = 10.0,
+                 rate_increase: float = 0.2, decrease_factor: float = 0.5, max_concurrency: int = 4,
+                 max_tries: int = 4, base_delay: float = 2.0, max_poisoned: int = 1000):
+        self.amazon = amazon
+        self.rate = initial_rate  # requests per second
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = rate_increase
+        self.decrease_factor = decrease_factor
+        self.concurrency = 1
+        self.max_concurrency = max_concurrency
+        self.max_tries = max_tries
+        self.base_delay = base_delay
+
+        self.in_flight = 0
+        self.next_slot = 0.0
+        self.success_streak = 0
+        self._cond = None
+        self._cond_loop = None
+
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+        self.splits = 0
+        self.poisoned = deque(maxlen=max_poisoned)  # most recent rejected ASINs; bounded for --daemon
+        self.poisoned_total = 0
+
+    # ---------- AIMD ----------
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.rate_increase)
+        self.success_streak += 1
+        # one more concurrent call after a full window of successes
+        if self.success_streak >= self.concurrency * 4 and self.concurrency < self.max_concurrency:
+            self.concurrency += 1
+            self.success_streak = 0
+
+    def on_throttle(self):
+        self.throttled += 1
+        metrics.inc("deals_paapi_throttled_total")
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self.concurrency = max(1, self.concurrency // 2)
+        self.success_streak = 0
+        logger.warning("PA-API throttled: rate -> %.2f req/s, concurrency -> %d", self.rate, self.concurrency)
+
+    # ---------- pacing ----------
+    def _condition(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._cond_loop is not loop:
+            self._cond = asyncio.Condition()
+            self._cond_loop = loop
+            self.in_flight = 0
+        return self._cond
+
+    async def _acquire(self):
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self.in_flight < self.concurrency)
+            self.in_flight += 1
+        now = time.monotonic()
+        slot = max(now, self.next_slot)
+        self.next_slot = slot + 1.0 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _release(self):
+        cond = self._condition()
+        async with cond:
+            self.in_flight -= 1
+            cond.notify_all()
+
+    # ---------- calls ----------
+    async def _call(self, asins: List[str]):
+        await self._acquire()
+        try:
+            self.calls += 1
+            return await asyncio.to_thread(self.amazon.get_items, asins)
+        finally:
+            await self._release()
+
+    async def get_items(self, asins: List[str]) -> list:
+        """
+        Fetch up to PAAPI_MAX_BATCH ASINs. Throttling and transient errors are retried
+        with backoff; a poisoned batch is split until the bad ASIN is isolated and skipped.
+        Raises FatalPaapiError for credential problems, or the last error once retries run out.
+        """
+        tries = 0
+        while True:
+            try:
+                items = await self._call(asins)
+                self.on_success()
+                return items or []
+            except Exception as e:
+                kind = classify_error(e)
+                if kind == NOT_FOUND:
+                    self.on_success()
+                    return []
+                if kind == FATAL:
+                    raise FatalPaapiError(str(e)) from e
+                if kind == POISON:
+                    return await self._split(asins, e)
+                if kind == THROTTLED:
+                    self.on_throttle()
+                tries += 1
+                if tries >= self.max_tries:
+                    logger.error("PA-API: giving up on batch of %d after %d tries: %s", len(asins), tries, e)
+                    raise
+                self.retries += 1
+                metrics.inc("deals_paapi_retries_total", kind=kind)
+                sleep_for = self.base_delay * (2 ** (tries - 1)) + random.uniform(0, 1.0)
+                logger.warning("PA-API %s error (try %d/%d): %s. Sleeping %.2fs",
+                               kind, tries, self.max_tries, e, sleep_for)
+                await asyncio.sleep(sleep_for)
+
+    async def _split(self, asins: List[str], error: Exception) -> list:
+        if len(asins) == 1:
+            logger.warning("PA-API rejected ASIN %s: %s", asins[0], error)
+            self.poisoned.append(asins[0])
+            self.poisoned_total += 1
+            metrics.inc("deals_paapi_poisoned_asins_total")
+            return []
+        self.splits += 1
+        metrics.inc("deals_paapi_batch_splits_total")
+        mid = len(asins) // 2
+        left = await self.get_items(asins[:mid])
+        right = await self.get_items(asins[mid:])
+        return left + right
+
+    def log_stats(self):
+        metrics.set("deals_paapi_rate", self.rate)
+        metrics.set("deals_paapi_concurrency", self.concurrency)
+        logger.info("PA-API: %d calls, %d throttled, %d retries, %d splits, %d poisoned ASINs, "
+                    "final rate %.2f req/s, concurrency %d",
+                    self.calls, self.throttled, self.retries, self.splits, self.poisoned_total,
+                    self.rate, self.concurrency)
@@ -0,0 +1,135 @@
+"""
+page_cache.py - on-disk cache for scraped deals pages
+Features:
+ - Stores ETag, Last-Modified and a content hash per URL
+ - Validators for conditional requests (If-None-Match / If-Modified-Since)
+ - Reuses the previously extracted ASIN set on 304 or identical body hash
+ - TTL + LRU eviction, SQLite file under DEALS_DATA_DIR
+"""
+
+import time
+import sqlite3
+import hashlib
+import logging
+
+logger = logging.getLogger("amazon_deals_bot")
+
+
+def content_hash(html: str) -> str:
+    return hashlib.blake2b(html.encode("utf-8", errors="replace"), digest_size=16).hexdigest()
+
+
+class PageCache:
+    """
+    Rows are loaded into memory at open (one per URL, so small) and written back in
+    one transaction by save(), which also applies TTL and LRU eviction.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 24 * 3600, max_entries: int = 2000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = set()
+        self.hits_304 = 0
+        self.hits_hash = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT,"
+            " asins TEXT NOT NULL, fetched_at REAL NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.commit()
+        cutoff = time.time() - ttl_seconds
+        for url, etag, last_modified, digest, asins, fetched_at, last_used in self.conn.execute(
+                "SELECT url, etag, last_modified, content_hash, asins, fetched_at, last_used FROM pages"
+                " WHERE fetched_at >= ?", (cutoff,)):
+            self.entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_hash": digest,
+                "asins": set(asins.split()) if asins else set(),
+                "fetched_at": fetched_at,
+                "last_used": last_used,
+            }
+
+    def get(self, url: str):
+        entry = self.entries.get(url)
+        if entry is not None and entry["fetched_at"] < time.time() - self.ttl_seconds:
+            return None
+        return entry
+
+    def conditional_headers(self, entry) -> dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def not_modified(self, url: str):
+        """304 response: the stored ASIN set is still current."""
+        entry = self.entries[url]
+        entry["fetched_at"] = entry["last_used"] = time.time()
+        self.dirty.add(url)
+        self.hits_304 += 1
+        return entry["asins"]
+
+    def lookup_body(self, url: str, digest: str):
+        """Return the cached ASIN set if this exact body was parsed before, else None."""
+        entry = self.get(url)
+        if entry is not None and entry["content_hash"] == digest:
+            entry["fetched_at"] = entry["last_used"] = time.time()
+            self.dirty.add(url)
+            self.hits_hash += 1
+            return entry["asins"]
+        self.misses += 1
+        return None
+
+    def put(self, url: str, digest: str, asins, etag: str = None, last_modified: str = None):
+        now = time.time()
+        self.entries[url] = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": digest,
+            "asins": set(asins),
+            "fetched_at": now,
+            "last_used": now,
+        }
+        self.dirty.add(url)
+
+    def update_validators(self, url: str, etag: str = None, last_modified: str = None):
+        entry = self.entries.get(url)
+        if entry is not None:
+            entry["etag"] = etag
+            entry["last_modified"] = last_modified
+            self.dirty.add(url)
+
+    def save(self):
+        try:
+            rows = [(url, e["etag"], e["last_modified"], e["content_hash"], " ".join(sorted(e["asins"])),
+                     e["fetched_at"], e["last_used"])
+                    for url, e in self.entries.items() if url in self.dirty]
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.ttl_seconds,))
+                self.conn.execute(
+                    "DELETE FROM pages WHERE url NOT IN"
+                    " (SELECT url FROM pages ORDER BY last_used DESC LIMIT ?)", (self.max_entries,)
+                )
+            self.dirty.clear()
+        except Exception as e:
+            logger.exception("Error saving page cache: %s", e)
+
+    def log_stats(self):
+        total = self.hits_304 + self.hits_hash + self.misses
+        logger.info("Page cache: %d not-modified, %d same-hash, %d parsed (%d pages)",
+                    self.hits_304, self.hits_hash, self.misses, total)
+
+    def close(self, save: bool = True):
+        if save:
+            self.save()
+        self.conn.close()
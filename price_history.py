@@ -0,0 +1,191 @@
+"""
+price_history.py - per-ASIN price time series with precomputed rolling aggregates
+Features:
+ - Append-only SQLite table of (asin, observed_at, price), indexed by (asin, observed_at)
+ - Unchanged prices re-observed within min_interval are not stored again (keeps the table compact)
+ - Rolling 30-day low / median / count kept in a per-ASIN stats table, refreshed on save()
+   only for ASINs observed this run, so filters never re-read history
+ - Each stats row carries its window's (observed_at, price) points; save() updates them from
+   the new rows instead of re-reading the prices table
+ - Aggregates are held in memory for one run only (dropped on save(), so --daemon stays bounded)
+ - "Lowest in N days" and "X% below the N-day median" checks are one dict lookup per ASIN
+"""
+
+import time
+import sqlite3
+import logging
+from array import array
+from itertools import chain
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("amazon_deals_bot")
+
+PriceStats = namedtuple("PriceStats", "low median count updated_at")
+
+
+def _pack_points(points: List[Tuple[float, float]]) -> bytes:
+    return array("d", chain.from_iterable(points)).tobytes()
+
+
+def _unpack_points(blob: bytes) -> List[Tuple[float, float]]:
+    values = array("d")
+    values.frombytes(blob)
+    return list(zip(values[0::2], values[1::2]))
+
+
+class PriceHistory:
+    def __init__(self, path: str, window_days: float = 30, retention_days: float = 90,
+                 min_interval_seconds: float = 3600, min_points: int = 3):
+        self.path = path
+        self.window_seconds = window_days * 86400
+        self.retention_seconds = max(retention_days, window_days) * 86400
+        self.min_interval_seconds = min_interval_seconds
+        self.min_points = min_points  # below this many observations the filters do not reject
+        self._pending = {}  # asin -> (observed_at, price)
+        self._stats: Dict[str, Optional[PriceStats]] = {}
+        self._last: Dict[str, tuple] = {}  # asin -> (observed_at, price) of the newest stored row
+        self.recorded = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS prices (asin TEXT NOT NULL, observed_at REAL NOT NULL, price REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prices_asin_time ON prices(asin, observed_at)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_prices_time ON prices(observed_at)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS price_stats ("
+            " asin TEXT PRIMARY KEY, low REAL NOT NULL, median REAL NOT NULL, points INTEGER NOT NULL,"
+            " last_price REAL NOT NULL, last_at REAL NOT NULL, updated_at REAL NOT NULL, window_points BLOB)"
+        )
+        # stats tables created before window_points was added; their rows are seeded from prices once
+        if "window_points" not in {row[1] for row in self.conn.execute("PRAGMA table_info(price_stats)")}:
+            self.conn.execute("ALTER TABLE price_stats ADD COLUMN window_points BLOB")
+        self.conn.commit()
+
+    # ---------- lookups ----------
+    def prefetch(self, asins: Iterable[str]):
+        """Load aggregates for a batch of ASINs in one query; later stats() calls are dict lookups."""
+        todo = [a for a in asins if a not in self._stats]
+        for i in range(0, len(todo), 500):
+            chunk = todo[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT asin, low, median, points, last_price, last_at, updated_at"
+                f" FROM price_stats WHERE asin IN ({marks})", chunk,
+            )
+            found = {}
+            stale_before = time.time() - self.window_seconds
+            for asin, low, median, points, last_price, last_at, updated_at in rows:
+                self._last[asin] = (last_at, last_price)
+                # not observed for a whole window: the aggregates describe prices outside it
+                if last_at >= stale_before:
+                    found[asin] = PriceStats(low, median, points, updated_at)
+            for asin in chunk:
+                self._stats[asin] = found.get(asin)
+
+    def stats(self, asin: str) -> Optional[PriceStats]:
+        if asin not in self._stats:
+            self.prefetch((asin,))
+        return self._stats[asin]
+
+    def is_lowest(self, asin: str, price: float) -> bool:
+        """True if price is at or below every price seen in the window (or history is too short to tell)."""
+        s = self.stats(asin)
+        if s is None or s.count < self.min_points:
+            return True
+        return price <= s.low
+
+    def below_median_pct(self, asin: str, price: float) -> Optional[float]:
+        """How far price is below the window median, in %; None while history is too short."""
+        s = self.stats(asin)
+        if s is None or s.count < self.min_points or not s.median:
+            return None
+        return (s.median - price) / s.median * 100
+
+    # ---------- recording ----------
+    def record(self, asin: str, price: float, observed_at: float = None):
+        if not asin or price is None:
+            return
+        self._pending[asin] = (time.time() if observed_at is None else observed_at, float(price))
+
+    def save(self):
+        """Append pending observations, refresh aggregates of the ASINs they touch, prune old rows."""
+        pending, self._pending = self._pending, {}
+        if pending:
+            self._write(pending)
+        # the next run prefetches its own ASINs again; nothing is kept across runs
+        self._stats.clear()
+        self._last.clear()
+
+    def _write(self, pending: dict):
+        self.prefetch(pending)
+        rows = []
+        for asin, (observed_at, price) in pending.items():
+            last = self._last.get(asin)
+            if last and last[1] == price and observed_at - last[0] < self.min_interval_seconds:
+                continue
+            rows.append((asin, observed_at, price))
+        now = time.time()
+        window_start = now - self.window_seconds
+        try:
+            with self.conn:
+                # read before inserting, so a window seeded from the prices table does not already hold the new row
+                windows = self._windows([asin for asin, _, _ in rows], window_start)
+                self.conn.executemany("INSERT INTO prices (asin, observed_at, price) VALUES (?, ?, ?)", rows)
+                stats = []
+                for asin, observed_at, price in rows:
+                    points = [pt for pt in windows.get(asin, ()) if pt[0] >= window_start]
+                    if observed_at >= window_start:
+                        points.append((observed_at, price))
+                    if points:
+                        stats.append(self._aggregate(asin, points, now))
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO price_stats"
+                    " (asin, low, median, points, last_price, last_at, updated_at, window_points)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", stats,
+                )
+                self.conn.execute("DELETE FROM prices WHERE observed_at < ?", (now - self.retention_seconds,))
+                self.conn.execute("DELETE FROM price_stats WHERE last_at < ?", (now - self.retention_seconds,))
+        except Exception as e:
+            self._pending.update(pending)
+            logger.exception("Error saving price history: %s", e)
+            return
+        self.recorded += len(rows)
+
+    def _windows(self, asins: List[str], window_start: float) -> Dict[str, List[Tuple[float, float]]]:
+        """Stored window points of the given ASINs; rows from before window_points existed read prices once."""
+        windows = {}
+        for i in range(0, len(asins), 500):
+            chunk = asins[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for asin, blob in self.conn.execute(
+                    f"SELECT asin, window_points FROM price_stats WHERE asin IN ({marks})", chunk):
+                if blob is not None:
+                    windows[asin] = _unpack_points(blob)
+                else:
+                    windows[asin] = self.conn.execute(
+                        "SELECT observed_at, price FROM prices WHERE asin = ? AND observed_at >= ?",
+                        (asin, window_start),
+                    ).fetchall()
+        return windows
+
+    @staticmethod
+    def _aggregate(asin: str, points: List[Tuple[float, float]], now: float) -> tuple:
+        points.sort()
+        prices = sorted(price for _, price in points)
+        n = len(prices)
+        median = prices[n // 2] if n % 2 else (prices[n // 2 - 1] + prices[n // 2]) / 2
+        last_at, last_price = points[-1]
+        return asin, prices[0], median, n, last_price, last_at, now, _pack_points(points)
+
+    def log_stats(self):
+        total = self.conn.execute("SELECT COUNT(*) FROM price_stats").fetchone()[0]
+        logger.info("Price history: %d observations stored this run, %d ASINs tracked", self.recorded, total)
+
+    def close(self, save: bool = True):
+        if save:
+            self.save()
+        self.conn.close()
@@ -0,0 +1,121 @@
+"""
+product.py - compact product record for enriched deals
+Features:
+ - __slots__ record with numeric price / MRP; discount derived on access
+ - Display strings (₹ prices, "You Save", affiliate URL) built lazily, only when formatted
+ - Numeric JSON record for the item cache
+ - Marketplace host and currency per record (amazon.in / ₹ unless routed to another marketplace)
+"""
+
+import time
+from typing import Optional
+
+NA = "N/A"
+DEFAULT_HOST = "www.amazon.in"
+DEFAULT_CURRENCY = "₹"
+
+
+class Product:
+    __slots__ = ("asin", "title", "price_amount", "mrp_amount", "primary_image", "availability",
+                 "category", "category_score", "seen_at", "partner_tag", "host", "currency")
+
+    def __init__(self, asin: str, title: str, price_amount: float, mrp_amount: float = 0.0,
+                 primary_image: Optional[str] = None, availability: Optional[str] = None,
+                 category: Optional[str] = None, category_score: int = 0, seen_at: float = None,
+                 partner_tag: Optional[str] = None, host: str = DEFAULT_HOST, currency: str = DEFAULT_CURRENCY):
+        self.asin = asin
+        self.title = title
+        self.price_amount = price_amount
+        self.mrp_amount = mrp_amount
+        self.primary_image = primary_image
+        self.availability = availability
+        self.category = category
+        self.category_score = category_score
+        self.seen_at = time.time() if seen_at is None else seen_at
+        self.partner_tag = partner_tag
+        self.host = host
+        self.currency = currency
+
+    def __repr__(self):
+        return f"Product({self.asin!r}, price={self.price_amount}, mrp={self.mrp_amount}, category={self.category!r})"
+
+    # ---------- derived values ----------
+    @property
+    def discount_amount(self) -> float:
+        return self.mrp_amount - self.price_amount if self.mrp_amount else 0.0
+
+    @property
+    def discount_percentage(self) -> float:
+        return self.discount_amount / self.mrp_amount * 100 if self.mrp_amount else 0.0
+
+    # ---------- display strings (built on access) ----------
+    @property
+    def current_price(self) -> str:
+        return f"{self.currency}{self.price_amount}"
+
+    @property
+    def mrp(self) -> str:
+        return f"{self.currency}{self.mrp_amount}" if self.mrp_amount else NA
+
+    @property
+    def discount(self) -> str:
+        if not self.mrp_amount:
+            return NA
+        return f"{self.currency}{self.discount_amount:.0f} ({self.discount_percentage:.0f}% off)"
+
+    @property
+    def affiliate_url(self) -> str:
+        return f"https://{self.host}/dp/{self.asin}?tag={self.partner_tag}&linkCode=ogi&th=1&psc=1"
+
+    # ---------- serialisation ----------
+    def to_record(self) -> dict:
+        """Numeric fields only, for the item cache."""
+        return {
+            "asin": self.asin,
+            "title": self.title,
+            "price_amount": self.price_amount,
+            "mrp_amount": self.mrp_amount,
+            "primary_image": self.primary_image,
+            "availability": self.availability,
+            "category": self.category,
+            "category_score": self.category_score,
+            "seen_at": self.seen_at,
+        }
+
+    @classmethod
+    def from_record(cls, record: dict, partner_tag: Optional[str] = None, host: str = DEFAULT_HOST,
+                    currency: str = DEFAULT_CURRENCY) -> "Product":
+        """Inverse of to_record()."""
+        return cls(
+            record["asin"],
+            record.get("title"),
+            record["price_amount"],
+            record.get("mrp_amount", 0.0),
+            primary_image=record.get("primary_image"),
+            availability=record.get("availability"),
+            category=record.get("category"),
+            category_score=record.get("category_score", 0),
+            seen_at=record.get("seen_at"),
+            partner_tag=partner_tag,
+            host=host,
+            currency=currency,
+        )
+
+    def to_dict(self) -> dict:
+        """Display fields plus numeric values, for JSON export."""
+        return {
+            "asin": self.asin,
+            "title": self.title,
+            "primary_image": self.primary_image or NA,
+            "current_price": self.current_price,
+            "mrp": self.mrp,
+            "discount": self.discount,
+            "discount_percentage": self.discount_percentage,
+            "availability": self.availability or NA,
+            "category": self.category,
+            "category_score": self.category_score,
+            "affiliate_url": self.affiliate_url,
+            "price_amount": self.price_amount,
+            "mrp_amount": self.mrp_amount,
+            "seen_at": self.seen_at,
+        }
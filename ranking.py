@@ -0,0 +1,242 @@
+"""
+ranking.py - columnar product table and weighted top-K ranking
+Features:
+ - Enriched products held column-wise in typed array('d') / array('h') columns
+ - Weighted score: category, discount %, absolute saving, price band, freshness
+ - Table filled incrementally as products are accepted; columns built with C-level map() passes
+ - Top-K via a heapq.nlargest threshold over the score column (no full sort, no per-row key calls)
+ - Per-category quotas so one category cannot flood the channel
+"""
+
+import math
+import time
+import heapq
+import logging
+from array import array
+from itertools import compress, repeat
+from operator import add, and_, attrgetter, ge, le, mul, sub
+from collections import namedtuple
+from typing import Iterable, List, Optional, Tuple
+
+from product import Product
+
+logger = logging.getLogger("amazon_deals_bot")
+
+# defaults reproduce the original ordering: category_score * 2 + discount_percentage
+RankWeights = namedtuple("RankWeights", "category discount saving price_band freshness")
+RankWeights.__new__.__defaults__ = (2.0, 1.0, 0.0, 0.0, 0.0)
+
+
+def parse_weights(spec: Optional[str]) -> RankWeights:
+    """'category=2,discount=1,saving=5' -> RankWeights; unnamed weights keep their defaults."""
+    weights = RankWeights()
+    if not spec:
+        return weights
+    values = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in RankWeights._fields:
+            raise ValueError(f"unknown ranking weight {name!r} (expected one of {', '.join(RankWeights._fields)})")
+        values[name] = float(value)
+    return weights._replace(**values)
+
+
+def parse_price_band(spec: Optional[str]) -> Tuple[float, float]:
+    """'299-4999' -> (299.0, 4999.0); an empty side is open ('-999', '500-')."""
+    if not spec:
+        return 0.0, math.inf
+    low, _, high = spec.partition("-")
+    return float(low) if low.strip() else 0.0, float(high) if high.strip() else math.inf
+
+
+def top_rows(scores: array, k: int) -> List[int]:
+    """
+    Indices of the k highest scores, best first, ties in row order: the same as
+    heapq.nlargest(k, range(n), key=scores.__getitem__), without a Python key call per row.
+    """
+    n = len(scores)
+    if k >= n:
+        return sorted(range(n), key=scores.__getitem__, reverse=True)
+    if k <= 0:
+        return []
+    threshold = heapq.nlargest(k, scores)[-1]
+    rows = compress(range(n), map(le, repeat(threshold), scores))
+    # the sort is stable, so of the rows tied at the threshold the earliest are kept
+    return sorted(rows, key=scores.__getitem__, reverse=True)[:k]
+
+
+class CategoryQuota:
+    """Running per-category counts; allow() admits an item and counts it if its category has room."""
+
+    def __init__(self, limit: int = 0):
+        self.limit = limit  # 0 = unlimited
+        self.counts = {}
+
+    def allow(self, category) -> bool:
+        if not self.limit:
+            return True
+        n = self.counts.get(category, 0)
+        if n >= self.limit:
+            return False
+        self.counts[category] = n + 1
+        return True
+
+
+class ProductTable:
+    """
+    Index-aligned columns over Product records. Scoring reads only the numeric
+    columns; the rows are touched again only for the selected ones.
+    """
+
+    def __init__(self, products: Iterable[Product] = ()):
+        self.rows = []
+        self.category = array("h")  # index into category_names, -1 = no category
+        self.category_score = array("d")
+        self.discount = array("d")
+        self.saving = array("d")
+        self.price = array("d")
+        self.seen_at = array("d")
+        self.category_names = []
+        self._category_ids = {None: -1}
+        self.extend(products)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _category_id(self, name) -> int:
+        cid = self._category_ids.get(name)
+        if cid is None:
+            cid = self._category_ids[name] = len(self.category_names)
+            self.category_names.append(name)
+        return cid
+
+    def append(self, product: Product):
+        self.extend((product,))
+
+    def extend(self, products: Iterable[Product]):
+        """
+        Each column is filled from one C-level map() / attrgetter pass over the batch
+        (array.fromlist); only the discount and saving columns need a comprehension.
+        """
+        products = list(products)
+        prices = list(map(attrgetter("price_amount"), products))
+        mrps = list(map(attrgetter("mrp_amount"), products))
+        categories = list(map(attrgetter("category"), products))
+        for name in dict.fromkeys(categories):  # first-seen order, as if appended one at a time
+            self._category_id(name)
+        # same values as Product.discount_percentage / discount_amount
+        diffs = list(map(sub, mrps, prices))
+        self.rows.extend(products)
+        self.category.fromlist(list(map(self._category_ids.__getitem__, categories)))
+        self.category_score.fromlist(list(map(float, map(attrgetter("category_score"), products))))
+        self.discount.fromlist([d / m * 100 if m else 0.0 for d, m in zip(diffs, mrps)])
+        self.saving.fromlist([d if d > 0 else 0.0 for d in diffs])
+        self.price.fromlist(list(map(float, prices)))
+        self.seen_at.fromlist(list(map(attrgetter("seen_at"), products)))
+
+
+class Ranker:
+    def __init__(self, weights: RankWeights = RankWeights(), price_band: Tuple[float, float] = (0.0, math.inf),
+                 freshness_half_life_hours: float = 24.0, category_quota: int = 0):
+        self.weights = weights
+        self.price_band = price_band
+        self.freshness_half_life_hours = freshness_half_life_hours
+        self.category_quota = category_quota
+
+    def _decay(self) -> float:
+        return math.log(2) / (self.freshness_half_life_hours * 3600) if self.freshness_half_life_hours > 0 else 0.0
+
+    # ---------- scoring ----------
+    def score_product(self, product, now: float = None) -> float:
+        """Score of a single Product with the same formula as scores(); used by the streaming pipeline."""
+        w = self.weights
+        score = 0.0
+        if w.category:
+            score += w.category * (product.category_score or 0)
+        if w.discount:
+            score += w.discount * product.discount_percentage
+        if w.saving:
+            score += w.saving * math.log10(1.0 + max(0.0, product.discount_amount))
+        if w.price_band:
+            low, high = self.price_band
+            score += w.price_band * (low <= product.price_amount <= high)
+        if w.freshness:
+            now = time.time() if now is None else now
+            score += w.freshness * math.exp(-self._decay() * (now - (product.seen_at or 0.0)))
+        return score
+
+    def scores(self, table: ProductTable, now: float = None) -> array:
+        """
+        One score per row. Terms are combined column-wise with map() over operator
+        functions, so the per-row work runs in C; zero-weight terms are skipped.
+        """
+        w = self.weights
+        terms = []
+        if w.category:
+            terms.append(map(mul, repeat(w.category), table.category_score))
+        if w.discount:
+            terms.append(map(mul, repeat(w.discount), table.discount))
+        if w.saving:
+            # log scale: a ₹1000 saving adds 3 * weight, a ₹10000 saving 4 * weight
+            terms.append(map(mul, repeat(w.saving), map(math.log10, map(add, repeat(1.0), table.saving))))
+        if w.price_band:
+            low, high = self.price_band
+            in_band = map(and_, map(le, repeat(low), table.price), map(ge, repeat(high), table.price))
+            terms.append(map(mul, repeat(w.price_band), in_band))
+        if w.freshness:
+            # 1.0 for a product seen now, halving every freshness_half_life_hours (unknown seen_at -> 0)
+            now = time.time() if now is None else now
+            ages = map(sub, repeat(now), table.seen_at)
+            fresh = map(math.exp, map(mul, repeat(-self._decay()), ages))
+            terms.append(map(mul, repeat(w.freshness), fresh))
+
+        if not terms:
+            return array("d", bytes(8 * len(table)))
+        total = terms[0]
+        for term in terms[1:]:
+            total = map(add, total, term)
+        return array("d", total)
+
+    # ---------- selection ----------
+    def top_indices(self, table: ProductTable, k: int, now: float = None) -> List[int]:
+        """Row indices of the k best products, best first, within the per-category quota."""
+        n = len(table)
+        k = min(k, n)
+        if k <= 0:
+            return []
+        scores = self.scores(table, now)
+        if not self.category_quota:
+            return top_rows(scores, k)
+
+        # the quota can admit at most limit * categories rows; beyond that nothing is left to find
+        k = min(k, self.category_quota * (len(table.category_names) + (-1 in table.category)))
+        # usually a few times k best rows are enough to fill the quota; otherwise walk the full order
+        picked = self._fill_quota(table, top_rows(scores, k * 4), k)
+        if len(picked) < k and k * 4 < n:
+            picked = self._fill_quota(table, top_rows(scores, n), k)
+        return picked
+
+    def _fill_quota(self, table: ProductTable, candidates: List[int], k: int) -> List[int]:
+        quota = CategoryQuota(self.category_quota)
+        picked = []
+        for i in candidates:
+            if quota.allow(table.category[i]):
+                picked.append(i)
+                if len(picked) == k:
+                    break
+        return picked
+
+    def top(self, table: ProductTable, k: int, now: float = None) -> List[Product]:
+        picked = self.top_indices(table, k, now)
+        if len(picked) < len(table) and self.category_quota:
+            logger.info("Ranking: %d of %d products selected (quota %d per category)",
+                        len(picked), len(table), self.category_quota)
+        return [table.rows[i] for i in picked]
+
+    def rank(self, products: List[Product], k: int = None, now: float = None) -> List[Product]:
+        """Convenience: best-first products from a list."""
+        table = ProductTable(products)
+        return self.top(table, len(table) if k is None else k, now)
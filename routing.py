@@ -0,0 +1,173 @@
+"""
+routing.py - fan-out of enriched deals to several Telegram channels and marketplaces
+Features:
+ - Marketplaces (region, host, currency, partner tag, deals URLs), each scraped and enriched once per run
+ - Channels bound to one marketplace, with rules on category, minimum discount and price range
+ - Per-channel dedup store and optional per-channel send rate
+ - Routing file (JSON), e.g.
+     {"marketplaces": {"IN": {"partner_tag": "tag-21"}, "US": {"partner_tag": "tag-20"}},
+      "channels": [{"chat_id": "@fashion_deals", "marketplace": "IN", "categories": ["Fashion", "Clothing"],
+                    "min_discount": 30, "max_price": 2999, "rate_per_min": 10},
+                   {"chat_id": "@us_deals", "marketplace": "US"}]}
+"""
+
+import re
+import json
+import logging
+from collections import namedtuple
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger("amazon_deals_bot")
+
+# PA-API region -> (storefront host, currency symbol); only regions amazon_paapi supports
+MARKETPLACE_HOSTS = {
+    "IN": ("www.amazon.in", "₹"),
+    "US": ("www.amazon.com", "$"),
+    "UK": ("www.amazon.co.uk", "£"),
+    "DE": ("www.amazon.de", "€"),
+    "FR": ("www.amazon.fr", "€"),
+    "IT": ("www.amazon.it", "€"),
+    "ES": ("www.amazon.es", "€"),
+    "CA": ("www.amazon.ca", "$"),
+    "JP": ("www.amazon.co.jp", "¥"),
+    "AU": ("www.amazon.com.au", "$"),
+    "BR": ("www.amazon.com.br", "R$"),
+    "MX": ("www.amazon.com.mx", "$"),
+    "NL": ("www.amazon.nl", "€"),
+    "BE": ("www.amazon.com.be", "€"),
+    "PL": ("www.amazon.pl", "zł"),
+    "SE": ("www.amazon.se", "kr "),
+    "TR": ("www.amazon.com.tr", "₺"),
+    "AE": ("www.amazon.ae", "AED "),
+    "SA": ("www.amazon.sa", "SAR "),
+    "SG": ("www.amazon.sg", "S$"),
+}
+
+Marketplace = namedtuple("Marketplace", "region host currency partner_tag deals_urls")
+
+
+def make_marketplace(region: str, partner_tag: str, deals_urls: Optional[List[str]] = None) -> Marketplace:
+    region = region.upper()
+    if region not in MARKETPLACE_HOSTS:
+        raise ValueError(f"unknown marketplace {region!r} (known: {', '.join(MARKETPLACE_HOSTS)})")
+    host, currency = MARKETPLACE_HOSTS[region]
+    return Marketplace(region, host, currency, partner_tag, deals_urls)
+
+
+def channel_slug(chat_id) -> str:
+    """Filesystem-safe directory name for a chat id like '@deals' or '-100123'."""
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", str(chat_id)).strip("_") or "channel"
+
+
+class Channel:
+    def __init__(self, chat_id, marketplace: Optional[str] = None, categories: Optional[Iterable[str]] = None,
+                 min_discount: float = 0, min_price: float = 0, max_price: Optional[float] = None,
+                 rate_per_min: Optional[float] = None):
+        self.chat_id = chat_id
+        self.marketplace = marketplace.upper() if marketplace else None
+        self.categories = frozenset(categories) if categories else None  # None = every category
+        self.min_discount = min_discount
+        self.min_price = min_price
+        self.max_price = max_price
+        self.rate_per_min = rate_per_min  # None = the publisher's default per-chat rate
+
+    def __repr__(self):
+        return f"Channel({self.chat_id!r}, marketplace={self.marketplace!r})"
+
+    def matches(self, product) -> bool:
+        if self.categories is not None and product.category not in self.categories:
+            return False
+        if product.discount_percentage < self.min_discount:
+            return False
+        if product.price_amount < self.min_price:
+            return False
+        return self.max_price is None or product.price_amount <= self.max_price
+
+    @classmethod
+    def from_dict(cls, spec: dict, default_marketplace: str) -> "Channel":
+        if not spec.get("chat_id"):
+            raise ValueError(f"channel without chat_id: {spec!r}")
+        return cls(
+            spec["chat_id"],
+            marketplace=spec.get("marketplace") or default_marketplace,
+            categories=spec.get("categories"),
+            min_discount=float(spec.get("min_discount", 0)),
+            min_price=float(spec.get("min_price", 0)),
+            max_price=float(spec["max_price"]) if spec.get("max_price") is not None else None,
+            rate_per_min=float(spec["rate_per_min"]) if spec.get("rate_per_min") is not None else None,
+        )
+
+
+def load_routing(path: str, default_region: str, default_partner_tag: str):
+    """Routing file -> ({region: Marketplace}, [Channel]); marketplaces keep file order."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    marketplaces: Dict[str, Marketplace] = {}
+    for region, spec in (data.get("marketplaces") or {}).items():
+        spec = spec or {}
+        marketplaces[region.upper()] = make_marketplace(
+            region, spec.get("partner_tag") or default_partner_tag, spec.get("deals_urls"))
+    channels = [Channel.from_dict(spec, default_region.upper()) for spec in data.get("channels") or []]
+    if not channels:
+        raise ValueError(f"{path}: no channels configured")
+    for channel in channels:
+        if channel.marketplace not in marketplaces:
+            if channel.marketplace != default_region.upper():
+                raise ValueError(f"{path}: channel {channel.chat_id} uses undeclared marketplace "
+                                 f"{channel.marketplace!r}")
+            marketplaces[channel.marketplace] = make_marketplace(channel.marketplace, default_partner_tag)
+    return marketplaces, channels
+
+
+class ChannelRouter:
+    """
+    Channels of one run and their dedup stores (chat_id -> SentStore). An ASIN stays
+    a candidate while at least one channel has not received it; route() picks the
+    channels a product still goes to.
+    """
+
+    def __init__(self, channels: List[Channel], stores: dict):
+        self.channels = channels
+        self.stores = stores
+
+    def subset(self, marketplace: str) -> "ChannelRouter":
+        """The channels of one marketplace, sharing this router's stores."""
+        return ChannelRouter([c for c in self.channels if c.marketplace == marketplace], self.stores)
+
+    def route(self, product) -> List[Channel]:
+        return [c for c in self.channels if c.matches(product) and not self.stores[c.chat_id].contains(product.asin)]
+
+    def filter_unsent(self, asins: Iterable[str]) -> List[str]:
+        asins = list(asins)
+        chats = {c.chat_id for c in self.channels}
+        if len(chats) == 1:
+            return self.stores[next(iter(chats))].filter_unsent(asins)
+        unsent = set()
+        for chat_id in chats:
+            unsent.update(self.stores[chat_id].filter_unsent(asins))
+        return [a for a in asins if a in unsent]
+
+    def is_sent(self, chat_id, asin: str) -> bool:
+        store = self.stores.get(chat_id)
+        return store is not None and store.contains(asin)
+
+    def mark(self, chat_id, asin: str):
+        store = self.stores.get(chat_id)
+        if store is None:
+            logger.warning("Sent %s to unrouted chat %s; not recorded", asin, chat_id)
+            return
+        store.mark(asin)
+
+    def rate_overrides(self) -> Dict[str, float]:
+        return {c.chat_id: c.rate_per_min for c in self.channels if c.rate_per_min is not None}
+
+    def flush(self):
+        for store in self.stores.values():
+            store.flush()
+
+    def close(self):
+        for store in self.stores.values():
+            store.close()
+
+    def __len__(self) -> int:
+        return sum(len(self.stores[chat_id]) for chat_id in {c.chat_id for c in self.channels})
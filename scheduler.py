@@ -0,0 +1,51 @@
+"""
+scheduler.py - per-URL refresh intervals for daemon mode
+Features:
+ - Each deals URL has its own interval (hot categories every few minutes, the rest hourly)
+ - Interval rules matched by URL substring, e.g. "goldbox=300;rh=n%3A1571271031=900"
+ - due() / mark_run() / seconds_until_next() drive a single long-lived event loop
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("amazon_deals_bot")
+
+
+def parse_interval_rules(spec: Optional[str]) -> List[Tuple[str, float]]:
+    """'substring=seconds;...' -> [(substring, seconds)]; the last '=' splits, so URL fragments may contain '='."""
+    rules = []
+    for part in (spec or "").split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        pattern, sep, seconds = part.rpartition("=")
+        if not sep or not pattern:
+            raise ValueError(f"bad URL interval rule {part!r} (expected substring=seconds)")
+        rules.append((pattern, float(seconds)))
+    return rules
+
+
+class UrlSchedule:
+    def __init__(self, urls: List[str], default_interval: float, rules: List[Tuple[str, float]] = ()):
+        self.intervals: Dict[str, float] = {}
+        for url in urls:
+            # first matching rule wins
+            self.intervals[url] = next((s for p, s in rules if p in url), default_interval)
+        self.next_run: Dict[str, float] = {url: 0.0 for url in urls}  # everything is due at startup
+
+    def due(self, now: float) -> List[str]:
+        return [url for url, at in self.next_run.items() if at <= now]
+
+    def mark_run(self, urls: List[str], now: float):
+        for url in urls:
+            self.next_run[url] = now + self.intervals[url]
+
+    def seconds_until_next(self, now: float) -> float:
+        if not self.next_run:
+            return float("inf")
+        return max(0.0, min(self.next_run.values()) - now)
+
+    def log_intervals(self):
+        for url, interval in self.intervals.items():
+            logger.info("   every %5.0fs : %s", interval, url)
@@ -0,0 +1,232 @@
+"""
+telegram_publisher.py - rate-scheduled Telegram publishing
+Features:
+ - Token buckets per chat (rate overridable per chat) and one global bucket (replaces fixed sleeps),
+   held in a SendLimiter that publishers of several marketplaces share (limits are per bot token)
+ - Honours retry_after from 429 responses
+ - Failed sends retried with exponential backoff via a durable queue (failed_sends.json)
+ - Reports queue depth and achieved send rate
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from collections import namedtuple
+
+logger = logging.getLogger("amazon_deals_bot")
+
+# ok: delivered; retry_after: seconds Telegram asked us to wait (429);
+# retryable: worth trying again later; error: short description for logs/state
+SendResult = namedtuple("SendResult", ["ok", "retry_after", "retryable", "error"])
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # tokens per second
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / self.rate)
+        return wait
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def block(self, seconds: float, now: float):
+        """Stop handing out tokens for `seconds` (used for Telegram's retry_after)."""
+        self.blocked_until = max(self.blocked_until, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+
+class SendLimiter:
+    """Per-chat token buckets and the global bucket of one bot token."""
+
+    def __init__(self, chat_rate_per_min: float = 20, chat_burst: float = 3, global_rate_per_sec: float = 25,
+                 chat_rates_per_min: dict = None):
+        self.chat_rate = chat_rate_per_min / 60.0
+        self.chat_rates = {chat: rate / 60.0 for chat, rate in (chat_rates_per_min or {}).items()}  # per-chat overrides
+        self.chat_burst = chat_burst
+        self.global_bucket = TokenBucket(global_rate_per_sec, global_rate_per_sec)
+        self.chat_buckets = {}
+
+    def chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            rate = self.chat_rates.get(chat_id, self.chat_rate)
+            bucket = self.chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    async def acquire(self, chat_id):
+        buckets = (self.chat_bucket(chat_id), self.global_bucket)
+        while True:
+            now = time.monotonic()
+            wait = max(b.wait_time(now) for b in buckets)
+            if wait <= 0:
+                for b in buckets:
+                    b.consume(now)
+                return
+            await asyncio.sleep(wait)
+
+    def block(self, chat_id, seconds: float):
+        self.chat_bucket(chat_id).block(seconds, time.monotonic())
+
+
+class TelegramPublisher:
+    """
+    Schedules send jobs against per-chat and global token buckets (its own SendLimiter
+    unless a shared one is passed in).
+    A job is a dict: key (ASIN), chat_id, message, image_url, attempts, next_attempt.
+    `send_fn(chat_id, message, image_url)` is a coroutine returning SendResult.
+    """
+
+    def __init__(self, send_fn, state_file: str, chat_rate_per_min: float = 20, chat_burst: float = 3,
+                 global_rate_per_sec: float = 25, max_attempts: int = 5, retry_base_delay: float = 30.0,
+                 on_sent=None, chat_rates_per_min: dict = None, limiter: SendLimiter = None):
+        self.send_fn = send_fn
+        self.state_file = state_file
+        self.limiter = limiter or SendLimiter(chat_rate_per_min, chat_burst, global_rate_per_sec, chat_rates_per_min)
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.on_sent = on_sent
+
+        self.failed = {}  # key -> job, persisted between runs
+        self.retry_heap = []  # (next_attempt, seq, key)
+        self._seq = itertools.count()
+
+        self.sent = 0
+        self.failures = 0
+        self.dropped = 0
+        self.started_at = None
+        self.queue_depth_fn = None
+        self.load()
+
+    # ---------- durable retry queue ----------
+    def load(self):
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                for key, job in data.items():
+                    self._schedule_retry(key, job)
+                if self.failed:
+                    logger.info("Loaded %d pending Telegram retries from %s", len(self.failed), self.state_file)
+        except Exception as e:
+            logger.exception("Error loading failed sends: %s", e)
+
+    def save(self):
+        try:
+            tmp = self.state_file + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.failed, f, indent=2)
+            os.replace(tmp, self.state_file)
+        except Exception as e:
+            logger.exception("Error saving failed sends: %s", e)
+
+    def _schedule_retry(self, key: str, job: dict):
+        job["seq"] = next(self._seq)
+        self.failed[key] = job
+        heapq.heappush(self.retry_heap, (job.get("next_attempt", 0), job["seq"], key))
+
+    def due_retries(self, now: float = None) -> list:
+        now = time.time() if now is None else now
+        due = []
+        while self.retry_heap and self.retry_heap[0][0] <= now:
+            _, seq, key = heapq.heappop(self.retry_heap)
+            job = self.failed.get(key)
+            # skip heap entries superseded by a newer job for the same key
+            if job is not None and job.get("seq") == seq:
+                due.append(job)
+        return due
+
+    def next_retry_at(self):
+        while self.retry_heap:
+            at, seq, key = self.retry_heap[0]
+            job = self.failed.get(key)
+            if job is not None and job.get("seq") == seq:
+                return at
+            heapq.heappop(self.retry_heap)
+        return None
+
+    # ---------- sending ----------
+    async def publish(self, job: dict) -> bool:
+        key = job["key"]
+        if self.started_at is None:
+            self.started_at = time.monotonic()
+        await self.limiter.acquire(job["chat_id"])
+        try:
+            result = await self.send_fn(job["chat_id"], job["message"], job.get("image_url"))
+        except Exception as e:
+            result = SendResult(False, None, True, str(e))
+
+        if result.ok:
+            self.sent += 1
+            self.failed.pop(key, None)
+            if self.on_sent:
+                self.on_sent(job)
+            if self.sent % 10 == 0:
+                self.log_stats()
+            return True
+
+        self.failures += 1
+        if result.retry_after:
+            self.limiter.block(job["chat_id"], result.retry_after)
+        attempts = job.get("attempts", 0) + 1
+        if not result.retryable or attempts >= self.max_attempts:
+            self.dropped += 1
+            self.failed.pop(key, None)
+            logger.warning("Dropping Telegram send for %s after %d attempt(s): %s", key, attempts, result.error)
+            return False
+
+        delay = max(result.retry_after or 0, self.retry_base_delay * (2 ** (attempts - 1)))
+        retry = dict(job, attempts=attempts, next_attempt=time.time() + delay, last_error=result.error)
+        self._schedule_retry(key, retry)
+        logger.warning("Send for %s failed (%s); retry %d/%d in %.0fs",
+                       key, result.error, attempts, self.max_attempts, delay)
+        return False
+
+    async def publish_due_retries(self):
+        for job in self.due_retries():
+            await self.publish(job)
+
+    async def drain_retries(self, max_wait: float):
+        """Keep retrying until the queue is empty or the next retry is past `max_wait`."""
+        deadline = time.time() + max_wait
+        while True:
+            await self.publish_due_retries()
+            at = self.next_retry_at()
+            if at is None or at > deadline:
+                return
+            await asyncio.sleep(max(0.0, at - time.time()))
+
+    # ---------- reporting ----------
+    def stats(self) -> dict:
+        elapsed = time.monotonic() - self.started_at if self.started_at else 0.0
+        return {
+            "sent": self.sent,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "pending_retries": len(self.failed),
+            "queue_depth": self.queue_depth_fn() if self.queue_depth_fn else 0,
+            "send_rate_per_min": (self.sent / elapsed * 60) if elapsed > 0 else 0.0,
+        }
+
+    def log_stats(self):
+        s = self.stats()
+        logger.info("Publisher: sent %d, failed %d, dropped %d, retries pending %d, queue depth %d, rate %.1f msg/min",
+                    s["sent"], s["failures"], s["dropped"], s["pending_retries"], s["queue_depth"],
+                    s["send_rate_per_min"])
@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# main.py reads its configuration at import time: point it at a scratch dir and fake credentials
+_SCRATCH = tempfile.mkdtemp(prefix="deals-tests-")
+os.environ.update(
+    DEALS_DATA_DIR=_SCRATCH,
+    EXPORT_DIR=os.path.join(_SCRATCH, "exports"),
+    LOG_FILE=os.path.join(_SCRATCH, "amazon_deals_bot.log"),
+    TELEGRAM_BOT_TOKEN="test-token",
+    TELEGRAM_CHANNEL_ID="@test",
+    AMAZON_ACCESS_KEY="test-access",
+    AMAZON_SECRET_KEY="test-secret",
+    TELEGRAM_API_BASE="http://127.0.0.1:9",
+    PARSE_WORKERS="0",
+    PAAPI_INITIAL_RATE="100",
+    DELAY_BETWEEN_MESSAGES="0",
+)
+os.environ.pop("ROUTING_FILE", None)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,104 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from dedup_store import AppendLogSentStore, migrate_legacy_json, open_sent_store
+
+DAY = 86400
+
+
+@pytest.fixture(params=["sqlite", "log"])
+def backend(request):
+    return request.param
+
+
+def write_legacy(path, ages_days):
+    now = datetime.now()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({asin: (now - timedelta(days=age)).isoformat() for asin, age in ages_days.items()}, f)
+
+
+def test_mark_flushes_in_batches_and_survives_reopen(tmp_path, backend):
+    store = open_sent_store(str(tmp_path), backend=backend, batch_size=2)
+    store.mark("B000000001")
+    assert "B000000001" in store  # pending entries count as sent before they are flushed
+    store.mark("B000000002")
+    store.mark("B000000003")
+    store.close()
+
+    store = open_sent_store(str(tmp_path), backend=backend)
+    assert store.filter_unsent(["B000000001", "B000000002", "B000000003", "B000000004"]) == ["B000000004"]
+    assert len(store) == 3
+    store.close()
+
+
+def test_entries_older_than_ttl_expire(tmp_path, backend):
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=DAY)
+    store.mark("B0000000OLD", sent_at=time.time() - 2 * DAY)
+    store.mark("B0000000NEW")
+    store.flush()
+    assert "B0000000OLD" not in store
+    assert store.expire() == 1
+    assert len(store) == 1
+    store.close()
+
+    # expired entries stay gone after a reopen
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=DAY)
+    assert store.filter_unsent(["B0000000OLD", "B0000000NEW"]) == ["B0000000OLD"]
+    store.close()
+
+
+def test_legacy_json_is_migrated_once(tmp_path, backend):
+    legacy = tmp_path / "sent_products.json"
+    write_legacy(legacy, {"B000000001": 1, "B000000002": 3, "B0000000OLD": 40})
+
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=30 * DAY, legacy_json=str(legacy))
+    assert not legacy.exists()
+    assert (tmp_path / "sent_products.json.migrated").exists()
+    assert store.filter_unsent(["B000000001", "B000000002", "B0000000OLD"]) == ["B0000000OLD"]
+    store.close()
+
+    # a second open finds nothing to import and keeps what the first one wrote
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=30 * DAY, legacy_json=str(legacy))
+    assert len(store) == 2
+    assert migrate_legacy_json(store, str(legacy)) == 0
+    store.close()
+
+
+def test_read_only_open_leaves_legacy_json_and_old_entries(tmp_path, backend):
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=DAY)
+    store.mark("B0000000OLD", sent_at=time.time() - 2 * DAY)
+    store.close()
+    legacy = tmp_path / "sent_products.json"
+    write_legacy(legacy, {"B000000001": 0})
+
+    store = open_sent_store(str(tmp_path), backend=backend, ttl_seconds=DAY, legacy_json=str(legacy),
+                            read_only=True)
+    store.close()
+    assert legacy.exists()
+    assert not (tmp_path / "sent_products.json.migrated").exists()
+    if backend == "sqlite":
+        import sqlite3
+        conn = sqlite3.connect(str(tmp_path / "sent_products.sqlite3"))
+        assert conn.execute("SELECT COUNT(*) FROM sent_products").fetchone()[0] == 1
+        conn.close()
+
+
+def test_append_log_skips_torn_line_and_compacts(tmp_path):
+    path = str(tmp_path / "sent_products.log")
+    store = AppendLogSentStore(path, ttl_seconds=DAY, batch_size=1)
+    for i in range(150):
+        store.mark(f"B0{i:08d}", sent_at=time.time() - 2 * DAY)
+    store.mark("B0000000NEW")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("B0000000BAD\t")  # interrupted append: no timestamp, no newline
+    store.close()
+
+    store = AppendLogSentStore(path, ttl_seconds=DAY)
+    assert store.filter_unsent(["B0000000NEW", "B0000000BAD"]) == ["B0000000BAD"]
+    # the 150 expired lines outnumber the live one, so loading rewrote the log
+    with open(path, "r", encoding="utf-8") as f:
+        assert f.read().splitlines() == [f"B0000000NEW\t{store.entries['B0000000NEW']:.3f}"]
+    store.close()
@@ -0,0 +1,120 @@
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from telegram_publisher import SendResult
+
+URLS = [f"https://www.amazon.in/deals?page={i}" for i in range(4)]
+ASINS_PER_PAGE = 6
+
+
+def page_asins(url):
+    page = int(url.rsplit("=", 1)[1])
+    return [f"B0{page:02d}{j:06d}" for j in range(ASINS_PER_PAGE)]
+
+
+def paapi_item(asin):
+    price = lambda amount: SimpleNamespace(amount=amount)  # noqa: E731
+    listing = SimpleNamespace(price=price(50.0), saving_basis=price(100.0), availability=None)
+    return SimpleNamespace(asin=asin, images=None, offers=SimpleNamespace(listings=[listing]),
+                           item_info=SimpleNamespace(title=SimpleNamespace(display_value="cotton shirt " + asin)))
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(main, "EXPORT_DIR", str(tmp_path / "exports"))
+    monkeypatch.setattr(main, "SENT_PRODUCTS_FILE", str(tmp_path / "data" / "sent_products.json"))
+    monkeypatch.setattr(main, "TELEGRAM_CHAT_RATE_PER_MIN", 60000)
+    bot = main.AmazonTelegramDealsBot("test-token", "@test")
+    bot.deals_urls = URLS
+
+    async def fetch_page(session, url, sem, timeout=20, extra_headers=None):
+        await asyncio.sleep(0.01)
+        html = " ".join(f'<a href="/dp/{asin}">x</a>' for asin in page_asins(url))
+        return html, {"status": 200, "etag": None, "last_modified": None}
+
+    async def send(session, message, image_url=None, chat_id=None):
+        bot.sent_messages.append(message)
+        return SendResult(True, None, False, None)
+
+    bot._fetch_page = fetch_page
+    bot.amazon.get_items = lambda asins: [paapi_item(a) for a in asins]
+    bot.send_telegram_request_async = send
+    bot.sent_messages = []
+    yield bot
+    bot.close()
+
+
+def run(bot, timeout=20):
+    """Run one pipeline, failing instead of hanging if a stage never finishes."""
+    return asyncio.run(asyncio.wait_for(bot.run_pipeline(max_products=100, delay_between_messages=0), timeout))
+
+
+def every_nth(fn, n, exc):
+    calls = [0]
+
+    def wrapper(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] % n == 0:
+            raise exc
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+def test_pipeline_publishes_every_new_deal(bot):
+    bot.start_export()
+    assert run(bot) == len(URLS) * ASINS_PER_PAGE
+    bot.finish_export()
+    assert len(bot.sent_messages) == len(URLS) * ASINS_PER_PAGE
+    with open(os.path.join(bot.export_dir, "amazon_deals_detailed.json"), encoding="utf-8") as f:
+        assert len(json.load(f)) == len(URLS) * ASINS_PER_PAGE
+
+    # everything is in the dedup store now, so a second run sends nothing
+    bot.sent_messages.clear()
+    assert run(bot) == 0
+
+
+def test_failing_export_drops_its_batch_and_the_run_completes(bot):
+    bot.start_export()
+    bot.export_product = every_nth(bot.export_product, 5, OSError(28, "No space left on device"))
+    sent = run(bot)
+    bot.finish_export(ok=False)
+    # a failed export abandons the rest of its enrich batch; the other batches still go out
+    assert 0 < sent < len(URLS) * ASINS_PER_PAGE
+
+
+def test_failing_publish_skips_the_product_and_the_run_completes(bot):
+    bot.start_export()
+    publish = bot._publish_product
+    calls = [0]
+
+    async def flaky_publish(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] % 4 == 0:
+            raise RuntimeError("telegram client bug")
+        return await publish(*args, **kwargs)
+
+    bot._publish_product = flaky_publish
+    sent = run(bot)
+    bot.finish_export()
+    assert sent == len(URLS) * ASINS_PER_PAGE - len(URLS) * ASINS_PER_PAGE // 4
+
+
+@pytest.mark.parametrize("stage", ["_enrich_stage", "_publish_stage"])
+def test_dead_stage_fails_the_run_instead_of_hanging(bot, stage):
+    async def dead(*args, **kwargs):
+        raise RuntimeError(f"{stage} died")
+
+    setattr(bot, stage, dead)
+    bot.start_export()
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="died"):
+        run(bot)
+    bot.finish_export(ok=False)
+    assert time.monotonic() - start < 10